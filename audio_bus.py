@@ -0,0 +1,180 @@
+import threading
+from functools import lru_cache
+import numpy as np
+import pyaudio
+from config import RATE, CHUNK, CHANNELS, FORMAT
+
+
+@lru_cache(maxsize=1)
+def get_device_index():
+    """ 기본 입력 가능한 마이크 장치 찾기 (장치 목록 조회 결과를 캐시, 장치를 열지 못하면 AudioBus.start()에서 캐시 비움) """
+    audio = pyaudio.PyAudio()
+    try:
+        for i in range(audio.get_device_count()):
+            dev = audio.get_device_info_by_index(i)
+            if dev['maxInputChannels'] > 0:
+                return i  # 첫 번째 사용 가능한 마이크 선택
+        return None
+    finally:
+        audio.terminate()
+
+
+class Subscription:
+    """
+    AudioBus 소비자 하나의 읽기 위치
+    - 각 소비자가 자기 커서만 움직이므로 소비자끼리 서로 기다리지 않음
+    - 너무 늦어 링 버퍼가 한 바퀴 돌면 밀린 블록(다음에 덮어쓸 슬롯 포함)은 건너뛰고 dropped에 개수 기록
+    """
+
+    def __init__(self, bus):
+        self._bus = bus
+        self.cursor = bus.write_index
+        self.dropped = 0
+
+    def read(self, timeout=0.5):
+        """
+        마지막으로 읽은 이후 새로 들어온 샘플을 링 버퍼의 memoryview(int16)로 반환 (없으면 timeout초까지 대기)
+        - 복사 없이 링 버퍼를 직접 가리키므로, 링이 한 바퀴 돌기 전에 처리하거나 필요하면 복사해서 보관
+        - 링 끝에서 이어지는 경우 뷰 2개, 새 데이터가 없으면 빈 리스트
+        """
+        bus = self._bus
+        if bus.write_index == self.cursor:
+            with bus._cond:
+                bus._cond.wait_for(lambda: bus.write_index != self.cursor or not bus.running, timeout)
+
+        end = bus.write_index
+        # 가장 오래된 블록(end - slots)의 슬롯은 콜백이 바로 다음에 덮어쓸 자리이므로 건너뛰고 그 다음 블록부터 읽음
+        oldest = end - bus.slots + 1
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            self.cursor = oldest
+        views = bus.views(self.cursor, end)
+        self.cursor = end
+        return views
+
+
+class AudioBus:
+    """
+    마이크 캡처 스트림 하나를 녹음(WAV 기록), 볼륨 표시, 실시간 변환 등 여러 소비자가 공유
+    - PyAudio 콜백 모드로 캡처하여 미리 할당한 NumPy 링 버퍼(slots x 블록)에 바로 복사 (블록마다 새 버퍼를 만들지 않음)
+    - 쓰는 쪽은 오디오 콜백 하나뿐이므로 잠금 없이 기록, 소비자는 subscribe()로 받은 Subscription으로 각자 읽음
+    - 볼륨 표시는 latest_block()/levels()로 최신 블록만 확인
+    """
+
+    def __init__(self, slots=512, frames_per_block=CHUNK, channels=CHANNELS):
+        self.slots = slots
+        self.block_samples = frames_per_block * channels
+        self._ring = np.zeros((slots, self.block_samples), dtype=np.int16)
+        self._flat = self._ring.reshape(-1)
+        self._slot_bytes = [memoryview(row).cast("B") for row in self._ring]  # 콜백에서 복사할 대상 (미리 생성)
+        self._level_scratch = np.empty(self.block_samples, dtype=np.float32)
+        self.write_index = 0  # 지금까지 기록된 블록 수 (단조 증가)
+        self.overflows = 0  # 장치 버퍼 넘침으로 드라이버에서 잃은 블록 수
+        self.error = None
+        self._cond = threading.Condition()
+        self._audio = None
+        self._stream = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self):
+        stream = self._stream
+        return stream is not None and stream.is_active()
+
+    def start(self):
+        """ 캡처 시작 (이미 실행 중이면 그대로), 장치를 열지 못하면 False 반환 """
+        with self._start_lock:
+            if self.running:
+                return True
+            self._close()
+            device_index = get_device_index()
+            print(f"🎤 선택된 마이크 장치: {device_index}")
+            if device_index is None:
+                get_device_index.cache_clear()  # 다음 start()에서 새로 연결된 장치를 다시 찾도록
+                self.error = "사용 가능한 마이크가 없습니다."
+                print(f"❌ {self.error}")
+                return False
+
+            audio = pyaudio.PyAudio()
+            try:
+                stream = audio.open(format=FORMAT, channels=CHANNELS,
+                                    rate=RATE, input=True, input_device_index=device_index,
+                                    frames_per_buffer=self.block_samples // CHANNELS,
+                                    stream_callback=self._callback)
+            except Exception as e:
+                audio.terminate()
+                get_device_index.cache_clear()  # 장치가 분리되었을 수 있으므로 다음 시도에서 다시 조회
+                self.error = str(e)
+                print(f"❌ 마이크 오류 발생: {e}")
+                return False
+
+            self.error = None
+            self._audio, self._stream = audio, stream
+            stream.start_stream()
+            return True
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """ PortAudio 오디오 스레드에서 호출: 받은 블록을 다음 슬롯에 복사만 하고 바로 반환 """
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        target = self._slot_bytes[self.write_index % self.slots]
+        size = min(len(in_data), len(target))
+        target[:size] = in_data[:size] if size < len(in_data) else in_data
+        if size < len(target):
+            target[size:] = bytes(len(target) - size)  # 짧은 블록은 나머지를 무음으로
+        self.write_index += 1
+        with self._cond:
+            self._cond.notify_all()
+        return None, pyaudio.paContinue
+
+    def _close(self):
+        stream, audio = self._stream, self._audio
+        self._stream = self._audio = None
+        if stream is not None:
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception as e:
+                print(f"❌ 마이크 오류: {e}")
+        if audio is not None:
+            audio.terminate()
+
+    def stop(self):
+        with self._start_lock:
+            self._close()
+        with self._cond:
+            self._cond.notify_all()
+
+    def subscribe(self):
+        return Subscription(self)
+
+    def views(self, start, end):
+        """ 블록 번호 [start, end) 구간을 가리키는 int16 memoryview 리스트 (링 끝에서 이어지면 2개) """
+        if start >= end:
+            return []
+        first, last = start % self.slots, (end - 1) % self.slots + 1
+        n = self.block_samples
+        if first < last:
+            return [memoryview(self._flat[first * n:last * n])]
+        return [memoryview(self._flat[first * n:]), memoryview(self._flat[:last * n])]
+
+    def latest_block(self):
+        """ 가장 최근 블록 (링 버퍼 뷰, 복사하지 않음) """
+        if self.write_index == 0:
+            return None
+        return self._ring[(self.write_index - 1) % self.slots]
+
+    def levels(self):
+        """ 최신 블록의 (RMS, 피크) 레벨 (0~1), 아직 데이터가 없으면 None (미리 만든 작업 버퍼에서 계산, 볼륨 표시 스레드 전용) """
+        block = self.latest_block()
+        if block is None:
+            return None
+        scratch = self._level_scratch
+        np.copyto(scratch, block)
+        rms = float(np.sqrt(np.dot(scratch, scratch) / len(scratch))) / 32768.0
+        peak = float(np.abs(scratch, out=scratch).max()) / 32768.0
+        return rms, peak
+
+
+# 프로그램 전체에서 공유하는 캡처 버스
+bus = AudioBus()
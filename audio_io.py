@@ -0,0 +1,238 @@
+import os
+import struct
+import subprocess
+import time
+import wave
+from math import gcd
+
+import numpy as np
+
+WHISPER_RATE = 16000  # Whisper / Pyannote 모델 입력 샘플링 레이트
+
+
+class WavStreamWriter:
+    """
+    녹음 프레임을 도착하는 즉시 디스크에 기록하는 WAV 작성기
+    - 헤더의 길이 필드를 주기적으로 갱신하여, 중간에 프로그램이 종료되어도 파일을 재생할 수 있음
+    - 프레임을 메모리에 모아두지 않으므로 녹음 시간이 길어져도 메모리 사용량이 일정함
+    """
+
+    HEADER_SIZE = 44
+
+    def __init__(self, path, channels, sample_width, rate, header_interval=1.0, fsync=True):
+        self.path = path
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.header_interval = header_interval
+        self.fsync = fsync
+
+        self._file = open(path, "wb")
+        self._data_bytes = 0
+        self._last_patch = time.monotonic()
+        self._write_header()
+
+    def _write_header(self):
+        """ RIFF/WAVE PCM 헤더(44바이트) 기록 """
+        block_align = self.channels * self.sample_width
+        byte_rate = self.rate * block_align
+        self._file.write(struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + self._data_bytes, b"WAVE",
+            b"fmt ", 16, 1, self.channels, self.rate, byte_rate, block_align, self.sample_width * 8,
+            b"data", self._data_bytes
+        ))
+
+    def _patch_header(self):
+        """ 현재까지 기록된 데이터 길이로 RIFF/data 크기 필드 갱신 후 디스크에 반영 """
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", 36 + self._data_bytes))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self._data_bytes))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_patch = time.monotonic()
+
+    def write(self, data):
+        """ PCM 프레임(bytes 또는 ndarray)을 파일 끝에 추가 """
+        self._file.write(data)
+        self._data_bytes += memoryview(data).nbytes
+        if time.monotonic() - self._last_patch >= self.header_interval:
+            self._patch_header()
+
+    @property
+    def frames_written(self):
+        return self._data_bytes // (self.channels * self.sample_width)
+
+    @property
+    def duration(self):
+        """ 현재까지 기록된 길이 (초) """
+        return self.frames_written / self.rate
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._patch_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Resampler:
+    """
+    녹음 스레드에서 블록 단위로 호출하는 폴리페이즈 리샘플러 (int16 → int16, 모노 다운믹스)
+    - 필터 뱅크를 미리 계산해 두고, 블록마다 NumPy 벡터 연산 한 번으로 출력 샘플을 계산
+    - 이전 블록의 꼬리 샘플을 보관하므로 블록 경계에서 끊김이 없음
+    """
+
+    def __init__(self, in_rate, out_rate=WHISPER_RATE, channels=1, taps_per_phase=32):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.channels = channels
+        self.up = out_rate // g      # L (44.1k → 16k: 160)
+        self.down = in_rate // g     # M (44.1k → 16k: 441)
+        self.taps = taps_per_phase
+
+        # 카이저 윈도우를 적용한 저역통과 sinc 필터 (업샘플된 레이트 기준)
+        n = self.up * self.taps
+        cutoff = 0.9 / max(self.up, self.down)
+        t = np.arange(n) - (n - 1) / 2
+        h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, 8.0) * self.up
+        # bank[p, j] = h[p + j*L], 입력 윈도우(과거→현재 순)와 바로 곱할 수 있도록 열 순서를 뒤집어 둠
+        self._bank = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0   # 지금까지 입력된 샘플 수
+        self._produced = 0   # 지금까지 출력된 샘플 수
+
+    def process(self, data):
+        """ int16 PCM(bytes 또는 ndarray) 블록을 받아 out_rate의 int16 모노 ndarray 반환 """
+        x = np.frombuffer(data, dtype=np.int16) if not isinstance(data, np.ndarray) else data
+        if self.channels > 1:
+            x = x.reshape(-1, self.channels).mean(axis=1)
+        x = x.astype(np.float32)
+
+        if self.up == self.down:
+            return np.clip(np.rint(x), -32768, 32767).astype(np.int16)
+
+        buf = np.concatenate([self._history, x])
+        buf_start = self._consumed - (self.taps - 1)  # buf[0]의 전역 입력 인덱스
+        self._consumed += len(x)
+
+        # 이번 블록까지의 입력으로 계산 가능한 출력 인덱스: n*M < consumed*L
+        end = -(-self._consumed * self.up // self.down)
+        n = np.arange(self._produced, end, dtype=np.int64)
+        self._produced = end
+
+        if len(n):
+            pos = n * self.down
+            base = pos // self.up - buf_start
+            phase = pos % self.up
+            windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+            y = np.einsum("ij,ij->i", windows[base - (self.taps - 1)], self._bank[phase])
+        else:
+            y = np.zeros(0, dtype=np.float32)
+
+        self._history = buf[len(buf) - (self.taps - 1):]
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+def read_wav_16k(path):
+    """
+    16kHz 16bit WAV 파일이면 디코딩/리샘플링 없이 float32 모노 배열로 바로 읽어 반환
+    (Whisper/Pyannote 입력 형식), 그 외 형식이면 None 반환
+    """
+    if not path.lower().endswith(".wav"):
+        return None
+    try:
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != WHISPER_RATE or wf.getsampwidth() != 2:
+                return None
+            channels = wf.getnchannels()
+            data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    except (wave.Error, EOFError):
+        return None
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    return data.astype(np.float32) / 32768.0
+
+
+def audio_duration(path):
+    """ 오디오 길이 (초), WAV는 헤더에서 바로 읽고 그 외 형식은 ffprobe 사용 (디코딩 없음) """
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as wf:
+                return wf.getnframes() / wf.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, text=True)
+    return float(result.stdout.strip() or 0)
+
+
+def load_audio_16k(path):
+    """ Whisper 입력 형식(16kHz float32 모노) 배열로 로드, 16kHz WAV가 아니면 ffmpeg로 디코딩 """
+    audio = read_wav_16k(path)
+    if audio is None:
+        import whisper
+        audio = whisper.load_audio(path)
+    return audio
+
+
+def iter_pcm_blocks(path, block_seconds=10, rate=WHISPER_RATE):
+    """
+    오디오 파일 전체를 메모리에 올리지 않고 rate(Hz) 모노 int16 블록 단위로 순차 반환
+    - 16kHz 16bit PCM WAV는 wave 모듈로 바로 읽고, 그 외 형식은 ffmpeg 파이프로 스트리밍 디코딩
+    """
+    block_frames = int(block_seconds * rate)
+    if path.lower().endswith(".wav"):
+        try:
+            wf = wave.open(path, "rb")
+        except (wave.Error, EOFError):
+            wf = None  # PCM이 아닌 WAV (IEEE float, WAVE_FORMAT_EXTENSIBLE 등)는 ffmpeg로 디코딩
+        if wf is not None:
+            with wf:
+                native = wf.getframerate() == rate and wf.getsampwidth() == 2 and wf.getnchannels() == 1
+                if native:
+                    while True:
+                        data = wf.readframes(block_frames)
+                        if not data:
+                            return
+                        yield np.frombuffer(data, dtype=np.int16)
+
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", path,
+           "-f", "s16le", "-ac", "1", "-ar", str(rate), "-"]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_frames * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def iter_array_blocks(samples, block_seconds=10, rate=WHISPER_RATE):
+    """ 메모리에 있는 배열을 iter_pcm_blocks와 같은 형태의 블록으로 나눠 반환 (복사 없음) """
+    block_frames = int(block_seconds * rate)
+    for i in range(0, len(samples), block_frames):
+        yield samples[i:i + block_frames]
+
+
+def encode_mp3(samples, rate=WHISPER_RATE, bitrate="64k"):
+    """ int16 모노 PCM을 ffmpeg 파이프로 한 번만 인코딩하여 MP3 바이트 반환 (임시 파일 없음) """
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error",
+           "-f", "s16le", "-ar", str(rate), "-ac", "1", "-i", "-",
+           "-f", "mp3", "-b:a", bitrate, "-"]
+    result = subprocess.run(cmd, input=np.ascontiguousarray(samples, dtype=np.int16).tobytes(),
+                            stdout=subprocess.PIPE, check=True)
+    return result.stdout
@@ -0,0 +1,185 @@
+import time
+import numpy as np
+from audio_io import load_audio_16k, WHISPER_RATE
+from config import MODEL_SIZE, USE_VAD, WHISPER_ENGINE, WHISPER_BATCH_SIZE
+from vad import detect_speech_regions, quietest_cut
+from whisper_engine import get_whisper_engine, engine_backend, segment_confidence, TorchWhisperEngine
+from transcriber import (transcript_cache, transcript_cache_key, print_cache_stats, write_transcript,
+                         transcribe_segments_local)
+
+WINDOW_SECONDS = 30  # Whisper 입력 창 길이
+TIME_PRECISION = 0.02  # 타임스탬프 토큰 1칸 = 20ms
+# 이 기준에 걸리면 배치 결과 대신 해당 창만 기존 방식(온도 재시도 포함)으로 다시 변환
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def plan_windows(audio, use_vad=True, window_seconds=WINDOW_SECONDS):
+    """
+    오디오를 30초 이하 창 [(시작 샘플, 끝 샘플), ...]으로 나눔
+    - 발화 구간을 앞에서부터 창 하나에 들어가는 만큼 묶고 (창은 어차피 30초로 채워지므로 묶어도 연산량 동일)
+    - 30초보다 긴 발화는 가장 조용한 지점에서 자름
+    """
+    max_samples = int(window_seconds * WHISPER_RATE)
+    regions = detect_speech_regions(audio, WHISPER_RATE) if use_vad else [(0, len(audio))]
+    windows = []
+    for s, e in regions:
+        if windows and e - windows[-1][0] <= max_samples:
+            windows[-1] = (windows[-1][0], e)
+            continue
+        if windows and e - s > max_samples and s - windows[-1][0] < max_samples // 2:
+            s = windows.pop()[0]  # 긴 발화는 앞 창의 남은 자리부터 채움 (자르는 지점은 앞 창 내용 이후에서만 탐색)
+        while e - s > max_samples:
+            cut = s + max(1, quietest_cut(audio[s:s + max_samples], WHISPER_RATE, search_from=max_samples // 2))
+            windows.append((s, cut))
+            s = cut
+        windows.append((s, e))
+    return windows
+
+
+def parse_timestamp_tokens(tokens, tokenizer, offset, window_end):
+    """
+    타임스탬프가 포함된 디코딩 토큰 (<|t0|> 텍스트 <|t1|><|t1|> 텍스트 <|t2|> ...)을 구간 리스트로 변환
+    offset: 창 시작 시각 (원본 기준 초), window_end: 닫는 타임스탬프 없이 끝난 마지막 구간의 끝 시각
+    """
+    segments = []
+    start, text_tokens = None, []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            t = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is not None and text_tokens:
+                segments.append({"start": offset + start, "end": offset + t,
+                                 "text": tokenizer.decode(text_tokens)})
+                start, text_tokens = None, []
+            else:
+                start = t
+        else:
+            text_tokens.append(token)
+    if text_tokens:
+        segments.append({"start": offset + (start or 0.0), "end": window_end, "text": tokenizer.decode(text_tokens)})
+    return [segment for segment in segments if segment["text"].strip()]
+
+
+def _iter_windows(audio_files, use_vad, failed):
+    """ 파일을 하나씩 로드하여 (파일 번호, 창 시작 초, 창 끝 초, 오디오 뷰)를 반환 (메모리에는 현재 파일만 유지) """
+    for index, path in enumerate(audio_files):
+        try:
+            audio = load_audio_16k(path)
+        except Exception as e:
+            print(f"❌ 오디오 로드 실패: {path} - {e}")
+            failed[index] = e
+            continue
+        windows = plan_windows(audio, use_vad)
+        speech = sum(e - s for s, e in windows) / WHISPER_RATE
+        print(f"📁 {path}: {len(audio) / WHISPER_RATE:.1f}초 → 창 {len(windows)}개 ({speech:.1f}초)")
+        for s, e in windows:
+            yield index, s / WHISPER_RATE, e / WHISPER_RATE, audio[s:e]
+
+
+def _decode_batch(model, tokenizer, batch, language):
+    """ 창 여러 개의 mel을 한 번에 인코더/디코더에 넣어 창별 구간 리스트 반환 (품질 기준 미달 창은 None) """
+    import torch
+    import whisper
+
+    mel = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(np.ascontiguousarray(chunk, dtype=np.float32)),
+                                                   n_mels=model.dims.n_mels) for _, _, _, chunk in batch])
+    options = whisper.DecodingOptions(language=language, task="transcribe", without_timestamps=False,
+                                      fp16=model.device.type == "cuda")
+    results = model.decode(mel.to(model.device), options)
+
+    decoded = []
+    for (_, start, end, _), result in zip(batch, results):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            decoded.append([])  # 무음 창
+        elif result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+            decoded.append(None)  # 반복/저신뢰 → 개별 재변환
+        else:
+            segments = parse_timestamp_tokens(result.tokens, tokenizer, start, end)
+            confidence = segment_confidence(result.avg_logprob)  # 배치 디코딩은 창 단위 점수만 있음
+            decoded.append([dict(seg, confidence=confidence) for seg in segments])
+    return decoded
+
+
+def transcribe_files_batched(audio_files, output_text_files=None, model_size=None, engine=None, language="ko",
+                             use_vad=USE_VAD, batch_size=WHISPER_BATCH_SIZE, use_cache=True):
+    """
+    여러 녹음 파일(또는 한 파일의 여러 VAD 구간)의 30초 창을 모아 batch_size개씩 한 번에 변환
+    - 창 사이 문맥(이전 문장 프롬프트)은 넘기지 않는 대신 인코더/디코더가 한 번에 여러 창을 처리
+    - 결과 타임스탬프는 각 파일의 원본 시각 기준, 파일별 구간 리스트를 입력 순서대로 반환 (실패한 파일은 None)
+    - output_text_files를 주면 파일별 텍스트도 저장
+    """
+    engine = engine or WHISPER_ENGINE
+    whisper_engine = get_whisper_engine(engine, model_size)
+    if not isinstance(whisper_engine, TorchWhisperEngine):
+        # faster-whisper 등 openai-whisper 모델이 아닌 엔진은 파일별로 기존 방식 사용 (VAD/캐시 포함)
+        print(f"⚠️ {whisper_engine.name} 엔진은 일괄 변환을 지원하지 않아 파일별로 변환합니다.")
+        results = []
+        for path, text_path in zip(audio_files, output_text_files or [None] * len(audio_files)):
+            try:
+                segments = transcribe_segments_local(path, model_size, use_vad, engine)
+            except Exception as e:
+                print(f"❌ 변환 실패 ({path}): {e}")
+                results.append(None)
+                continue
+            if text_path:
+                write_transcript(text_path, segments)
+            results.append(segments)
+        return results
+
+    import whisper
+    model = whisper_engine.model
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                language=language, task="transcribe")
+    backend = f"local-batch:{engine_backend(whisper_engine.name)}"  # 대체된 경우에도 실제 엔진 기준
+
+    results = [None] * len(audio_files)
+    failed = {}
+    pending_files = []
+    for index, path in enumerate(audio_files):
+        cached = transcript_cache.get(transcript_cache_key(path, backend, model_size or MODEL_SIZE, language, use_vad)) \
+            if use_cache else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending_files.append(index)
+            results[index] = []
+
+    start_time = time.time()
+    windows = _iter_windows([audio_files[i] for i in pending_files], use_vad, failed)
+    batch, retried, decoded_windows = [], 0, 0
+    while True:
+        item = next(windows, None)
+        if item is not None:
+            batch.append(item)
+            if len(batch) < batch_size:
+                continue
+        if not batch:
+            break
+        for (index, start, end, chunk), segments in zip(batch, _decode_batch(model, tokenizer, batch, language)):
+            if segments is None:
+                retried += 1
+                segments = [dict(seg, start=seg["start"] + start, end=seg["end"] + start)
+                            for seg in whisper_engine.transcribe(np.asarray(chunk, dtype=np.float32), language=language)]
+            results[pending_files[index]].extend(segments)
+        decoded_windows += len(batch)
+        batch = []
+        if item is None:
+            break
+
+    for index in failed:
+        results[pending_files[index]] = None
+    for i, path in enumerate(audio_files):
+        if results[i] is None:
+            continue
+        results[i].sort(key=lambda seg: seg["start"])
+        if use_cache and i in pending_files:
+            transcript_cache.put(transcript_cache_key(path, backend, model_size or MODEL_SIZE, language, use_vad), results[i])
+        if output_text_files:
+            write_transcript(output_text_files[i], results[i])
+
+    print(f"⏳ 일괄 변환 완료: 파일 {len(pending_files)}개, 창 {decoded_windows}개 (재변환 {retried}개), "
+          f"{round(time.time() - start_time, 2)}초")
+    if use_cache:
+        print_cache_stats()
+    return results
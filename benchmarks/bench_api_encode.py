@@ -0,0 +1,78 @@
+"""
+API 업로드 준비 벤치마크: 기존 방식 (WAV → 전체 MP3 → 디코딩 → 분할 MP3 재인코딩 → 파일 다시 열기)
+vs 새 방식 (녹음 PCM에서 분할본을 한 번만 인코딩, 메모리에서 바로 업로드)
+
+실행: python -m benchmarks.bench_api_encode [길이(분), 기본 60]
+(ffmpeg, pydub 필요 / 업로드는 하지 않고 업로드 직전까지의 시간과 디스크 I/O만 측정)
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from pydub import AudioSegment
+from audio_io import WavStreamWriter, iter_pcm_blocks, WHISPER_RATE
+from transcriber import iter_encoded_parts
+
+
+def make_wav(path, minutes):
+    """ 발화/무음이 섞인 합성 16kHz WAV 생성 (10초 블록 단위로 기록하여 메모리 사용 최소화) """
+    rng = np.random.default_rng(0)
+    with WavStreamWriter(path, 1, 2, WHISPER_RATE, fsync=False) as writer:
+        for i in range(minutes * 6):
+            block = rng.standard_normal(10 * WHISPER_RATE) * (3000 if i % 4 else 30)
+            writer.write(block.astype(np.int16))
+
+
+def legacy_path(wav_path, workdir):
+    """ 이전 transcribe_audio_api + split_audio_by_size 흐름 재현, (디스크 쓰기, 디스크 읽기) 바이트 반환 """
+    written = read = 0
+    mp3_file = os.path.join(workdir, "legacy.mp3")
+    AudioSegment.from_file(wav_path, format="wav").export(mp3_file, format="mp3", bitrate="64k")
+    written += os.path.getsize(mp3_file)
+
+    parts = [mp3_file]
+    if os.path.getsize(mp3_file) / (1024 * 1024) > 25:
+        audio = AudioSegment.from_mp3(mp3_file)
+        read += os.path.getsize(mp3_file)
+        num_parts = int(os.path.getsize(mp3_file) / (1024 * 1024) / 20) + 1
+        segment_length = len(audio) // num_parts
+        parts = []
+        for i in range(num_parts):
+            part_file = os.path.join(workdir, f"legacy_part{i}.mp3")
+            audio[i * segment_length:min((i + 1) * segment_length, len(audio))].export(
+                part_file, format="mp3", bitrate="64k")
+            written += os.path.getsize(part_file)
+            parts.append(part_file)
+
+    for part in parts:
+        with open(part, "rb") as f:
+            read += len(f.read())
+    return written, read
+
+
+def main():
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with tempfile.TemporaryDirectory() as workdir:
+        wav_path = os.path.join(workdir, "bench.wav")
+        make_wav(wav_path, minutes)
+        print(f"📁 테스트 WAV: {minutes}분, {os.path.getsize(wav_path) / 1024 ** 2:.1f}MB")
+
+        t0 = time.perf_counter()
+        written, read = legacy_path(wav_path, workdir)
+        legacy_seconds = time.perf_counter() - t0
+        print(f"🐢 기존 방식: {legacy_seconds:.1f}초, 중간 파일 쓰기 {written / 1024 ** 2:.1f}MB / 다시 읽기 {read / 1024 ** 2:.1f}MB")
+
+        t0 = time.perf_counter()
+        total = 0
+        parts = 0
+        for _, data, _ in iter_encoded_parts(iter_pcm_blocks(wav_path), "bench"):
+            total += len(data)
+            parts += 1
+        new_seconds = time.perf_counter() - t0
+        print(f"⚡ 새 방식: {new_seconds:.1f}초, 분할본 {parts}개 ({total / 1024 ** 2:.1f}MB, 메모리에서 바로 업로드), 중간 파일 0MB")
+        print(f"🚀 절약: {legacy_seconds - new_seconds:.1f}초, 디스크 I/O {(written + read) / 1024 ** 2:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+여러 파일 로컬 변환 벤치마크: 파일별 model.transcribe 반복 (기존) vs 30초 창을 묶어 한 번에 인코딩/디코딩 (일괄 변환)
+
+실행: python -m benchmarks.bench_batch_transcribe <오디오 파일 ...> [--batch-size N] [--engine 이름]
+(두 방식 모두 모델 로드 시간 제외, 캐시/VAD 사용 안 함 → 일괄 처리 효과만 비교 / 처리량 = 오디오 초 / 실제 초, 코어당 처리량도 함께 출력)
+"""
+import argparse
+import time
+from audio_io import load_audio_16k, WHISPER_RATE
+from batch_transcriber import transcribe_files_batched
+from config import WHISPER_BATCH_SIZE
+from whisper_engine import get_whisper_engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--batch-size", type=int, default=WHISPER_BATCH_SIZE)
+    parser.add_argument("--engine", default="torch")
+    args = parser.parse_args()
+
+    import torch
+    threads = torch.get_num_threads()
+    engine = get_whisper_engine(args.engine)
+    audio_seconds = sum(len(load_audio_16k(path)) for path in args.files) / WHISPER_RATE
+    print(f"📁 파일 {len(args.files)}개, 총 {audio_seconds / 60:.1f}분, 연산 스레드 {threads}개")
+
+    start_time = time.perf_counter()
+    for path in args.files:
+        engine.transcribe(load_audio_16k(path), language="ko")
+    loop_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    # 기존 방식과 같은 조건: 무음 구간 건너뛰기(VAD) 없이 전체 오디오를 창으로 나눠 변환
+    transcribe_files_batched(args.files, engine=args.engine, batch_size=args.batch_size, use_vad=False, use_cache=False)
+    batch_seconds = time.perf_counter() - start_time
+
+    for label, seconds in (("🐢 파일별 변환", loop_seconds), (f"⚡ 일괄 변환 (창 {args.batch_size}개씩)", batch_seconds)):
+        print(f"{label}: {seconds:.1f}초, 처리량 {audio_seconds / seconds:.2f}배속 "
+              f"(코어당 {audio_seconds / seconds / threads:.3f})")
+    print(f"🚀 {loop_seconds / batch_seconds:.2f}배 빠름")
+
+
+if __name__ == "__main__":
+    main()
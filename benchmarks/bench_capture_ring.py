@@ -0,0 +1,187 @@
+"""
+마이크 캡처 경로 벤치마크: 기존 방식 (stream.read마다 새 bytes, np.frombuffer/np.abs로 볼륨 계산, 읽는 스레드에서 바로 처리)
+vs 새 방식 (콜백이 미리 할당한 링 버퍼에 복사, 소비자는 memoryview로 읽음)
+
+실행: python -m benchmarks.bench_capture_ring [측정 시간(초), 기본 20] [소비자 지연(초), 기본 0.3]
+(실제 장치 대신 실시간 속도로 블록을 만드는 가상 마이크 사용, 장치 버퍼는 블록 4개 분량으로 가정
+ CPU 부하는 코어 수만큼의 계산 프로세스로 만들고, 소비자는 1초마다 지정한 시간만큼 멈춤 (fsync·GC·실시간 변환 등 재현))
+"""
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+from audio_bus import AudioBus
+from audio_io import WavStreamWriter, Resampler, WHISPER_RATE
+from config import RATE, CHUNK
+
+HOST_BUFFER_BLOCKS = 4  # 드라이버가 들고 있을 수 있는 블록 수 (넘치면 손실)
+ALLOC_STEPS = 2000
+
+
+def burn(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(100000))
+
+
+def legacy_step(raw):
+    data = bytes(raw)  # stream.read가 매번 새 bytes 생성
+    samples = np.frombuffer(data, dtype=np.int16)
+    return int(np.max(np.abs(samples)))  # 기존 볼륨 표시 계산
+
+
+def ring_step(raw, bus, subscription):
+    bus._callback(bytes(raw), CHUNK, None, 0)  # 콜백 모드에서도 PyAudio가 in_data bytes를 만드는 것은 동일
+    bus.levels()
+    return subscription.read(timeout=0)
+
+
+def transient_bytes(step):
+    """ 블록 하나 처리 중 새로 잡힌 메모리 최대치 (tracemalloc 기준) 평균 """
+    total = 0
+    tracemalloc.start()
+    for _ in range(ALLOC_STEPS):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step()
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / ALLOC_STEPS
+
+
+class SimulatedStream:
+    """ 가상 마이크용 스트림: AudioBus.running이 실제 캡처 중처럼 True가 되도록 함 (소비자가 새 블록을 기다리며 잠듦) """
+
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+
+
+def run_device(emit, stop):
+    """ 가상 마이크: 블록 주기마다 emit(bytes) 호출, 늦게 깨어나 장치 버퍼를 넘긴 블록은 손실로 계산 """
+    period = CHUNK / RATE
+    raw = bytearray((np.random.default_rng(0).standard_normal(CHUNK) * 3000).astype(np.int16).tobytes())
+    lost, produced = 0, 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        due = int((time.perf_counter() - start) / period) + 1
+        pending = due - produced
+        if pending > HOST_BUFFER_BLOCKS:
+            lost += pending - HOST_BUFFER_BLOCKS
+            produced += pending - HOST_BUFFER_BLOCKS
+        while produced < due:
+            emit(raw)
+            produced += 1
+        time.sleep(max(0.0, start + due * period - time.perf_counter()))
+    return lost
+
+
+def consume(blocks, writer, resampler, stall, stop):
+    """ 녹음 스레드 역할: 리샘플링 + WAV 기록, 1초마다 stall초 멈춤 """
+    next_stall = time.perf_counter() + 1
+    for data in blocks():
+        writer.write(resampler.process(data))
+        if time.perf_counter() >= next_stall:
+            time.sleep(stall)
+            next_stall = time.perf_counter() + 1
+        if stop.is_set():
+            break
+
+
+def measure_drops(mode, seconds, stall, workdir):
+    stop = threading.Event()
+    result = {}
+    writer = WavStreamWriter(os.path.join(workdir, f"{mode}.wav"), 1, 2, WHISPER_RATE, fsync=False)
+    resampler = Resampler(RATE, WHISPER_RATE)
+
+    if mode == "legacy":
+        host_buffer = queue.Queue(maxsize=HOST_BUFFER_BLOCKS)
+        result["overflow"] = 0
+
+        def emit(raw):
+            try:
+                host_buffer.put_nowait(bytes(raw))
+            except queue.Full:
+                result["overflow"] += 1
+
+        def blocks():
+            while not stop.is_set():
+                try:
+                    yield host_buffer.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+    else:
+        bus = AudioBus()
+        bus._stream = SimulatedStream()  # 캡처 중 상태여야 read()가 새 블록을 기다림 (아니면 바로 반환되어 바쁜 대기)
+        subscription = bus.subscribe()
+
+        def emit(raw):
+            bus._callback(bytes(raw), CHUNK, None, 0)
+
+        def blocks():
+            while not stop.is_set():
+                yield from subscription.read(timeout=0.5)
+
+    device = threading.Thread(target=lambda: result.__setitem__("lost", run_device(emit, stop)))
+    consumer = threading.Thread(target=consume, args=(blocks, writer, resampler, stall, stop))
+    device.start()
+    consumer.start()
+    time.sleep(seconds)
+    stop.set()
+    device.join()
+    if mode != "legacy":
+        bus.stop()  # 블록을 기다리는 소비자를 깨움
+    consumer.join()
+    writer.close()
+
+    dropped = result["lost"] + result.get("overflow", 0)
+    if mode != "legacy":
+        dropped += subscription.dropped
+    return dropped
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+    stall = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    blocks_per_second = RATE / CHUNK
+    raw = bytearray((np.random.default_rng(0).standard_normal(CHUNK) * 3000).astype(np.int16).tobytes())
+
+    bus = AudioBus()
+    subscription = bus.subscribe()
+    legacy = transient_bytes(lambda: legacy_step(raw))
+    ring = transient_bytes(lambda: ring_step(raw, bus, subscription))
+    print(f"🧮 블록당 임시 할당: 기존 {legacy:.0f}B ({legacy * blocks_per_second / 1024:.1f}KB/s) / "
+          f"링 버퍼 {ring:.0f}B ({ring * blocks_per_second / 1024:.1f}KB/s)")
+    print(f"   (두 방식 모두 PyAudio가 만드는 {len(raw)}B bytes 포함, 링 버퍼 {bus._ring.nbytes / 1024:.0f}KB는 시작 시 한 번만 할당)")
+
+    stop = multiprocessing.Event()
+    burners = [multiprocessing.Process(target=burn, args=(stop,), daemon=True) for _ in range(os.cpu_count() or 1)]
+    for p in burners:
+        p.start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            total = int(seconds * blocks_per_second)
+            for mode, label in (("legacy", "🐢 기존 방식"), ("ring", "⚡ 링 버퍼")):
+                dropped = measure_drops(mode, seconds, stall, workdir)
+                print(f"{label}: CPU 부하 {len(burners)}프로세스 + 소비자 {stall}초 지연, "
+                      f"{seconds:.0f}초 동안 손실 블록 {dropped}/{total} ({dropped / total * 100:.2f}%)")
+    finally:
+        stop.set()
+        for p in burners:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
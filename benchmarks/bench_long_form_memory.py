@@ -0,0 +1,45 @@
+"""
+장시간 녹음 읽기 메모리 벤치마크: 파일 전체를 배열로 로드 (기존) vs 블록 단위로 읽어 30초 창으로 나눔 (장시간 모드)
+
+실행: python -m benchmarks.bench_long_form_memory <오디오 파일>
+(모델 없이 오디오 읽기/창 나누기만 측정, 최대 메모리는 tracemalloc 기준 NumPy 배열 할당량)
+"""
+import argparse
+import time
+import tracemalloc
+from audio_io import load_audio_16k, iter_pcm_blocks, WHISPER_RATE
+from config import LONG_FORM_WINDOW_SECONDS, LONG_FORM_MIN_WINDOW_SECONDS
+from transcriber import iter_audio_windows
+
+
+def measure(run):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file")
+    args = parser.parse_args()
+
+    samples, full_seconds, full_peak = measure(lambda: len(load_audio_16k(args.file)))
+    print(f"📁 {args.file}: {samples / WHISPER_RATE / 60:.1f}분")
+
+    def windowed():
+        windows = iter_audio_windows(iter_pcm_blocks(args.file), int(LONG_FORM_WINDOW_SECONDS * WHISPER_RATE),
+                                     int(LONG_FORM_MIN_WINDOW_SECONDS * WHISPER_RATE))
+        return sum(1 for _ in windows)
+
+    count, window_seconds, window_peak = measure(windowed)
+    print(f"🐢 전체 로드: {full_seconds:.2f}초, 최대 메모리 {full_peak:.1f}MB")
+    print(f"⚡ 창 단위 읽기 ({count}개 창): {window_seconds:.2f}초, 최대 메모리 {window_peak:.1f}MB")
+    print(f"🚀 최대 메모리 {full_peak / window_peak:.1f}배 감소")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+화자 매칭 벤치마크: 기존 find_best_matching_speaker (구간마다 전체 순회) vs SpeakerIndex (정렬 인덱스 + 벡터 연산)
+
+실행: python -m benchmarks.bench_speaker_index [화자 구간 수] [텍스트 구간 수]
+"""
+import sys
+import time
+import numpy as np
+from diarizer import SpeakerIndex, find_best_matching_speaker
+
+
+def make_turns(n_turns, n_speakers=4, seed=0):
+    """ 무작위 길이의 화자 구간을 시간 순으로 생성 (일부 구간은 겹침) """
+    rng = np.random.default_rng(seed)
+    durations = rng.uniform(0.5, 8.0, n_turns)
+    starts = np.cumsum(rng.uniform(0.2, 6.0, n_turns))
+    speakers = rng.integers(0, n_speakers, n_turns)
+    return [{"start": float(s), "end": float(s + d), "speaker": f"SPEAKER_{k:02d}"}
+            for s, d, k in zip(starts, durations, speakers)]
+
+
+def make_lines(n_lines, total_seconds, seed=1):
+    rng = np.random.default_rng(seed)
+    starts = np.sort(rng.uniform(0, total_seconds, n_lines))
+    ends = starts + rng.uniform(0.5, 10.0, n_lines)
+    return starts, ends
+
+
+def main():
+    n_turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    turns = make_turns(n_turns)
+    starts, ends = make_lines(n_lines, turns[-1]["end"])
+
+    t0 = time.perf_counter()
+    index = SpeakerIndex(turns)
+    t1 = time.perf_counter()
+    speakers = index.assign(starts, ends)
+    t2 = time.perf_counter()
+    print(f"📊 화자 구간 {n_turns:,}개 / 텍스트 구간 {n_lines:,}개")
+    print(f"⚡ SpeakerIndex: 인덱스 생성 {(t1 - t0) * 1000:.1f}ms, 매칭 {(t2 - t1) * 1000:.1f}ms")
+
+    # 기존 방식은 O(N×M)이므로 일부 구간만 측정 후 전체 시간으로 환산
+    sample = min(n_lines, 200)
+    t3 = time.perf_counter()
+    legacy = [find_best_matching_speaker(starts[i], ends[i], turns) for i in range(sample)]
+    legacy_seconds = (time.perf_counter() - t3) * n_lines / sample
+    print(f"🐢 find_best_matching_speaker: 예상 {legacy_seconds:.1f}s ({sample}개 측정 후 환산)")
+    print(f"🚀 속도 향상: 약 {legacy_seconds / (t2 - t0):.0f}배")
+
+    agree = np.mean([a == b for a, b in zip(legacy, speakers[:sample])])
+    print(f"🔍 기존 방식과 동일한 화자 비율: {agree * 100:.1f}% (기존 방식은 처음 닿는 구간, 새 방식은 최대 겹침 기준)")
+
+
+if __name__ == "__main__":
+    main()
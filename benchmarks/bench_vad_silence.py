@@ -0,0 +1,74 @@
+"""
+무음 위주 녹음 VAD 회귀 점검: 배경 소음(-50/-40dBFS) 속 발화 비율별 건너뛴 무음 비율, 소음뿐인 블록 판정
+
+실행: python -m benchmarks.bench_vad_silence
+(합성 오디오 사용, 기대 범위를 벗어나면 ❌ 표시 후 종료 코드 1)
+"""
+import sys
+import numpy as np
+from audio_io import iter_array_blocks, WHISPER_RATE
+from vad import detect_speech_regions, TimelineMap, SpeechFilter
+
+RATE = WHISPER_RATE
+rng = np.random.default_rng(0)
+
+
+def noise(seconds, db=-50):
+    return rng.standard_normal(int(seconds * RATE)) * 10 ** (db / 20)
+
+
+def speech(seconds, db=-20, noise_db=-50):
+    """ 음절 단위로 크기가 변하는 합성 발화 (앞뒤 구간과 같은 배경 소음 포함) """
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = np.abs(np.sin(2 * np.pi * 2 * t)) ** 2
+    return rng.standard_normal(len(t)) * 10 ** (db / 20) * envelope + noise(seconds, noise_db)
+
+
+def check(label, ok, detail):
+    print(f"{'✅' if ok else '❌'} {label}: {detail}")
+    return ok
+
+
+def main():
+    results = []
+
+    # 100초 소음 가운데 발화 N초 (발화 비율 10% 미만에서도 무음을 건너뛰어야 함)
+    for speech_seconds in (0, 1, 5, 9, 12, 50):
+        audio = np.concatenate([noise(50), speech(speech_seconds), noise(50 - speech_seconds)])
+        timeline = TimelineMap(detect_speech_regions(audio, RATE), RATE, len(audio))
+        expected = 1 - (speech_seconds + 1) / (len(audio) / RATE)  # 발화 앞뒤 여유 포함
+        results.append(check(f"발화 {speech_seconds}초 / {len(audio) / RATE:.0f}초", timeline.skipped_fraction >= expected - 0.02,
+                             f"건너뛴 비율 {timeline.skipped_fraction:.3f} (기대 ≥ {expected - 0.02:.3f})"))
+
+    # 쉼 없는 발화는 전부 발화로 유지
+    audio = speech(30)
+    kept = sum(e - s for s, e in detect_speech_regions(audio, RATE)) / RATE
+    results.append(check("쉼 없는 발화 30초", kept >= 29, f"발화로 유지 {kept:.1f}초"))
+
+    # 소음뿐인 블록은 발화 구간 없음
+    for db in (-50, -40):
+        regions = detect_speech_regions(noise(10, db), RATE)
+        results.append(check(f"소음뿐인 10초 블록 ({db}dBFS)", not regions, f"발화 구간 {len(regions)}개"))
+
+    # 10초 블록 단위 스트리밍 (API 업로드 경로): 소음 블록은 건너뛰고 발화만 남김
+    for db in (-50, -40):
+        audio = np.concatenate([noise(20, db), speech(5, noise_db=db), noise(60, db), speech(3, -30, db), noise(40, db)])
+        speech_filter = SpeechFilter(RATE)
+        kept = sum(len(block) for block in speech_filter.filter(iter_array_blocks(audio))) / RATE
+        results.append(check(f"블록 단위 검출 (소음 {db}dBFS, 발화 8초 / {len(audio) / RATE:.0f}초)", 8 <= kept <= 10,
+                             f"업로드 {kept:.1f}초"))
+
+    # 배경 소음이 중간에 커지는 경우 (-50 → -40dBFS): 소음이 바뀌는 블록 하나 이후로는 커진 소음도 무음으로 판정
+    audio = np.concatenate([noise(20, -50), speech(5, noise_db=-50), noise(10, -50), noise(60, -40),
+                            speech(3, -25, -40), noise(30, -40)])
+    speech_filter = SpeechFilter(RATE)
+    kept = sum(len(block) for block in speech_filter.filter(iter_array_blocks(audio))) / RATE
+    results.append(check(f"소음 증가 (-50 → -40dBFS, 발화 8초 / {len(audio) / RATE:.0f}초)", 8 <= kept <= 20,
+                         f"업로드 {kept:.1f}초"))
+
+    print(f"\n📊 {sum(results)}/{len(results)} 통과")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
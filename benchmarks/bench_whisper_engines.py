@@ -0,0 +1,43 @@
+"""
+로컬 변환 엔진 실시간 계수(RTF) 비교: torch (기존 fp32) vs torch-int8 (동적 양자화) vs faster-whisper (CTranslate2 int8)
+RTF = 변환 시간 / 오디오 길이 (1보다 작으면 실시간보다 빠름), 모델 로드 시간은 제외
+
+실행: python -m benchmarks.bench_whisper_engines [한국어 테스트 파일, 기본 recordings/test.wav] [모델 크기, 기본 config.MODEL_SIZE]
+(같은 파일로 모든 엔진을 돌리고, 기존 엔진 결과와의 글자 단위 일치율도 함께 출력 / 설치되지 않은 엔진은 건너뜀)
+"""
+import difflib
+import sys
+import time
+from audio_io import load_audio_16k, WHISPER_RATE
+from config import MODEL_SIZE, WHISPER_CPU_THREADS
+from model_manager import manager
+from whisper_engine import ENGINES, get_whisper_engine
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "recordings/test.wav"
+    size = sys.argv[2] if len(sys.argv) > 2 else MODEL_SIZE
+    audio = load_audio_16k(path)
+    seconds = len(audio) / WHISPER_RATE
+    print(f"📁 테스트 파일: {path} ({seconds:.1f}초), 모델: {size}, CPU 스레드: {WHISPER_CPU_THREADS or '기본값'}")
+
+    baseline = None
+    for name in ENGINES:
+        engine = get_whisper_engine(name, size)
+        if engine.name != name:
+            continue  # 설치되지 않아 기본 엔진으로 대체된 경우
+        engine.transcribe(audio[:WHISPER_RATE * 5], language="ko")  # 첫 실행 준비 시간 제외
+
+        start_time = time.perf_counter()
+        text = "".join(segment["text"] for segment in engine.transcribe(audio, language="ko"))
+        elapsed = time.perf_counter() - start_time
+
+        if baseline is None:
+            baseline = text
+        similarity = difflib.SequenceMatcher(None, baseline, text).ratio()
+        print(f"🧠 {name:15s} RTF {elapsed / seconds:.3f} ({elapsed:.1f}초), 기존 결과와 일치율 {similarity * 100:.1f}%")
+        manager.clear()  # 다음 엔진 측정 전에 메모리 해제
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,51 @@ CHANNELS = 1  # 모노 채널
 RATE = 44100  # 샘플링 레이트
 CHUNK = 1024  # 버퍼 크기
 RECORD_SECONDS = 10  # 녹음 시간 (초)
+WAV_HEADER_INTERVAL = 1.0  # 녹음 중 WAV 헤더 갱신 주기 (초)
+ARCHIVE_ORIGINAL_RATE = False  # True: 원본 레이트(RATE) 그대로 보관 / False: 16kHz 모노로 저장 (Whisper·Pyannote 입력 형식)
 
 # Whisper 모델 설정
-MODEL_SIZE = "large-v3"
\ No newline at end of file
+MODEL_SIZE = "large-v3"
+USE_VAD = True  # 변환 전 VAD로 무음 구간 건너뛰기
+STREAM_MIN_CHUNK_SECONDS = 10  # 실시간 변환: 이 길이 이상 쌓이면 무음 지점에서 잘라 변환
+STREAM_MAX_CHUNK_SECONDS = 30  # 실시간 변환: 무음이 없어도 이 길이에서 강제로 자름 (Whisper 입력 창 길이)
+MODEL_RAM_BUDGET_GB = 8  # 동시에 메모리에 유지할 모델 용량 상한 (초과 시 오래된 모델부터 해제)
+WHISPER_ENGINE = "torch"  # 로컬 변환 엔진: "torch" (기존 PyTorch), "torch-int8" (CPU 동적 int8 양자화), "faster-whisper" (CTranslate2)
+WHISPER_CPU_THREADS = 0  # CPU 변환 연산 스레드 수 (0: 라이브러리 기본값 = 코어 수)
+FASTER_WHISPER_COMPUTE_TYPE = "int8"  # faster-whisper 연산 형식 (CPU: "int8", GPU: "float16" / "int8_float16")
+WHISPER_BATCH_SIZE = 8  # 여러 파일 일괄 변환 시 한 번에 인코더/디코더에 넣는 30초 창 개수
+LONG_FORM_MIN_SECONDS = 1800  # 이 길이 이상 녹음은 장시간 모드로 변환 (파일을 조금씩 읽어 창 단위 변환, 0: 사용 안 함)
+LONG_FORM_WINDOW_SECONDS = 30  # 장시간 모드: 창 최대 길이 (Whisper 입력 창 길이)
+LONG_FORM_MIN_WINDOW_SECONDS = 20  # 장시간 모드: 이 길이 이후의 무음 지점에서 창을 자름
+
+# 변환 결과 캐시 설정 (같은 오디오 + 같은 설정이면 저장된 결과 재사용)
+TRANSCRIPT_CACHE_DIR = "cache/transcripts"
+TRANSCRIPT_CACHE_MAX_MB = 512
+
+# OpenAI API 변환 설정
+API_MAX_WORKERS = 4  # 분할 파일 동시 업로드 수
+API_MAX_RETRIES = 3  # 분할 파일별 재시도 횟수
+API_RETRY_BASE_DELAY = 1.0  # 재시도 대기 시간 (초, 재시도마다 2배씩 증가)
+
+# 화자 분리 모델 설정
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+# 요약 설정
+SUMMARY_MODEL = "gpt-4o"
+SUMMARY_CONTEXT_TOKENS = 128000  # 모델 컨텍스트 길이 (입력 + 출력)
+SUMMARY_MAX_OUTPUT_TOKENS = 4096  # 요청당 최대 출력 토큰
+SUMMARY_SINGLE_PASS_TOKENS = 12000  # 이보다 긴 상담 내용은 구간별 정리(map) 후 병합(reduce)
+SUMMARY_CHUNK_TOKENS = 6000  # map 단계 구간 크기 (토큰)
+SUMMARY_MAX_WORKERS = 4  # map 단계 동시 요청 수
+SUMMARY_INCREMENTAL_BLOCK_TOKENS = 3000  # 실시간 요약: 이만큼 새 녹취가 쌓이면 정리 노트 갱신
+SUMMARY_CACHE_DIR = "cache/summaries"  # 요약 결과 캐시 (같은 녹취록 + 모델 + 프롬프트면 재사용)
+SUMMARY_CACHE_MAX_MB = 64
+
+# 작업 파이프라인 설정 (녹음 저장 → 변환 → 화자 분리 → 요약 → PDF, 단계별 동시 실행 수)
+PIPELINE_STAGE_WORKERS = {"record": 2, "transcribe": 1, "diarize": 1, "summarize": 2, "pdf": 1}
+
+# 일괄 처리 설정 (python main.py <녹음 폴더>)
+# 작업 프로세스 하나가 사용하는 메모리 (동시 실행 수 계산용)
+# local: 로컬 변환 (+ 화자 분리), diarize: 변환은 API/일괄 변환으로 하고 화자 분리 모델만 로드, api: 모델 없이 API 호출만
+BATCH_WORKER_MEMORY_GB = {"local": 6, "diarize": 3, "api": 1}
+BATCH_MANIFEST_NAME = "batch_manifest.json"  # 녹음 폴더에 저장되는 진행 기록 (중단 후 다시 실행하면 완료된 파일은 건너뜀)
@@ -1,27 +1,31 @@
-from pyannote.audio.pipelines import SpeakerDiarization
-from pyannote.audio import Model
-from pyannote.core import Segment
-import os
-from dotenv import load_dotenv
-import torch
-
-# 🔹 .env 파일에서 Hugging Face Access Token 로드
-load_dotenv()
-HF_TOKEN = os.getenv("HUGGINGFACE_ACCESS_TOKEN")
-
-# ✅ 최신 모델 사용 (3.1)
-pipeline = SpeakerDiarization.from_pretrained(
-    "pyannote/speaker-diarization-3.1", 
-    use_auth_token=HF_TOKEN
-)
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from audio_io import read_wav_16k, load_audio_16k, WHISPER_RATE
+from config import USE_VAD
+from segment_store import SegmentStore
+from model_manager import get_diarization_pipeline
 
 def diarize_audio(audio_path):
     """
     최신 Pyannote 모델을 사용하여 화자를 구분하고 타임스탬프를 반환
     """
+    # 16kHz WAV는 파형을 직접 넘겨 Pyannote 내부 디코딩/리샘플링 생략
+    audio = read_wav_16k(audio_path)
+    if audio is not None:
+        return diarize_waveform(audio)
     print("🔍 최신 Pyannote 모델을 사용한 화자 분리 실행 중...")
-    diarization = pipeline(audio_path)
+    return _speaker_segments(get_diarization_pipeline()(audio_path))
 
+def diarize_waveform(audio):
+    """ 이미 디코딩된 16kHz float32 모노 배열로 화자 분리 (파일을 다시 읽지 않음) """
+    import torch
+    print("🔍 최신 Pyannote 모델을 사용한 화자 분리 실행 중...")
+    # ✅ 최신 모델 사용 (3.1), 첫 호출 시 로드
+    pipeline = get_diarization_pipeline()
+    return _speaker_segments(pipeline({"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": WHISPER_RATE}))
+
+def _speaker_segments(diarization):
     speaker_segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
         speaker_segments.append({
@@ -32,9 +36,83 @@ def diarize_audio(audio_path):
 
     return speaker_segments
 
+class SpeakerIndex:
+    """
+    Pyannote 화자 구간을 화자별로 정렬·병합해 둔 구간 인덱스
+    - 화자별 누적 발화 시간 함수 C(t)를 만들어 두면, 구간 [a, b]와의 겹침 시간은 C(b) - C(a)
+    - 모든 Whisper 구간을 한 번에 searchsorted로 처리하므로 O((N + M) log M)
+    - 겹치는 화자가 없으면 시간상 가장 가까운 화자 구간으로 대체
+    """
+
+    def __init__(self, diarized_segments):
+        starts = np.array([seg["start"] for seg in diarized_segments], dtype=np.float64)
+        ends = np.array([seg["end"] for seg in diarized_segments], dtype=np.float64)
+        self.labels, codes = np.unique([seg["speaker"] for seg in diarized_segments], return_inverse=True)
+
+        # 화자별 병합 구간 (시작, 끝, 이전 구간까지의 누적 길이)
+        self._coverage = []
+        for k in range(len(self.labels)):
+            s, e = starts[codes == k], ends[codes == k]
+            order = np.argsort(s)
+            s, e = s[order], e[order]
+            run_end = np.maximum.accumulate(e)
+            is_new = np.ones(len(s), dtype=bool)
+            is_new[1:] = s[1:] > run_end[:-1]
+            merged_s = s[is_new]
+            merged_e = np.maximum.reduceat(e, np.flatnonzero(is_new))
+            cum = np.concatenate([[0.0], np.cumsum(merged_e - merged_s)[:-1]])
+            self._coverage.append((merged_s, merged_e, cum))
+
+        # 가장 가까운 화자 탐색용 (시작 기준 정렬 / 끝 기준 정렬)
+        order = np.argsort(starts)
+        self._by_start, self._by_start_code = starts[order], codes[order]
+        order = np.argsort(ends)
+        self._by_end, self._by_end_code = ends[order], codes[order]
+
+    def _covered_until(self, k, t):
+        """ 화자 k가 시각 t 이전까지 발화한 총 시간 C_k(t) """
+        s, e, cum = self._coverage[k]
+        i = np.searchsorted(s, t, side="right") - 1
+        ic = np.maximum(i, 0)
+        covered = cum[ic] + np.clip(t - s[ic], 0.0, e[ic] - s[ic])
+        return np.where(i >= 0, covered, 0.0)
+
+    def assign(self, starts, ends):
+        """ 각 구간 (starts[i], ends[i])에 겹침 시간이 가장 긴 화자 라벨 리스트 반환 """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if len(starts) == 0:
+            return []
+        if len(self.labels) == 0:
+            return ["Unknown"] * len(starts)
+
+        ends = np.maximum(ends, starts + 1e-3)  # 길이 0 구간도 포함 여부를 판단할 수 있도록 보정
+        overlaps = np.stack([self._covered_until(k, ends) - self._covered_until(k, starts)
+                             for k in range(len(self.labels))])
+        best = np.argmax(overlaps, axis=0)
+
+        # 겹침이 없는 구간: 앞쪽에서 끝난 구간과 뒤쪽에서 시작하는 구간 중 더 가까운 화자
+        missing = overlaps[best, np.arange(len(starts))] <= 0
+        if missing.any():
+            a, b = starts[missing], ends[missing]
+            j = np.searchsorted(self._by_end, a, side="right") - 1
+            gap_before = np.where(j >= 0, a - self._by_end[np.maximum(j, 0)], np.inf)
+            m = np.searchsorted(self._by_start, b, side="left")
+            gap_after = np.where(m < len(self._by_start),
+                                 self._by_start[np.minimum(m, len(self._by_start) - 1)] - b, np.inf)
+            best[missing] = np.where(gap_before <= gap_after,
+                                     self._by_end_code[np.maximum(j, 0)],
+                                     self._by_start_code[np.minimum(m, len(self._by_start) - 1)])
+
+        return self.labels[best].tolist()
+
+    def find(self, start_time, end_time):
+        return self.assign([start_time], [end_time])[0]
+
 def find_best_matching_speaker(start_time, end_time, diarized_segments):
     """
     Whisper 텍스트의 타임스탬프(start_time, end_time)와 가장 적절한 Pyannote 화자를 매칭
+    (이전 방식: 구간마다 전체 화자 구간을 순회, 비교/벤치마크용으로 유지. 새 코드는 SpeakerIndex 사용)
     """
     best_speaker = "Unknown"
     min_diff = float("inf")  # 최소 시간 차이 초기화
@@ -57,7 +135,7 @@ def find_best_matching_speaker(start_time, end_time, diarized_segments):
 
 def save_diarized_transcript(audio_path, transcript_path):
     """
-    Whisper 변환된 텍스트와 Pyannote의 화자 구분 데이터를 결합하여 최종 스크립트 생성
+    Whisper 변환 구간(구간 저장소, 타임스탬프 포함)과 Pyannote의 화자 구분 데이터를 결합하여 최종 스크립트 생성
     """
 
     # Pyannote는 WAV만 지원하므로 확장자 확인
@@ -65,51 +143,54 @@ def save_diarized_transcript(audio_path, transcript_path):
         print(f"❌ Pyannote는 WAV 형식만 지원합니다. 변환된 WAV 파일을 사용하세요: {audio_path}")
         return
 
-    diarized_segments = diarize_audio(audio_path)
-
-    # 🔍 Whisper 변환된 텍스트 파일 로드
-    if not os.path.exists(transcript_path):
-        print(f"❌ 오류: 변환된 텍스트 파일이 존재하지 않음 ({transcript_path})")
+    # 🔍 Whisper 변환 구간 로드 (텍스트 녹취록을 다시 파싱하지 않고 저장된 타임스탬프 그대로 사용)
+    store = SegmentStore.for_transcript(transcript_path)
+    if not store.exists():
+        print(f"❌ 오류: 변환 구간 파일이 존재하지 않음 ({store.path})")
         return
-
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript_lines = f.readlines()
-
-    if not transcript_lines:
-        print(f"❌ 오류: 변환된 텍스트 파일이 비어 있음 ({transcript_path})")
+    segments = store.read()
+    if not segments:
+        print(f"❌ 오류: 변환 구간이 비어 있음 ({store.path})")
         return
 
-    combined_results = []
-    for line in transcript_lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        parts = line.split(" ", 2)
-        if len(parts) < 3:
-            continue
-
-        try:
-            start_time, end_time, text = float(parts[0]), float(parts[1]), parts[2]
-        except ValueError:
-            print(f"⚠️ 경고: 잘못된 형식의 줄 발견 - {line}")
-            continue
-
-        # 🔍 가장 적절한 화자 찾기 (Pyannote 구간 내 또는 가장 가까운 화자 선택)
-        speaker = find_best_matching_speaker(start_time, end_time, diarized_segments)
-
-        combined_results.append({
-            "start": start_time,
-            "end": end_time,
-            "speaker": speaker,
-            "text": text
-        })
+    diarized_segments = diarize_audio(audio_path)
+    return write_diarized_transcript(transcript_path, assign_speakers(segments, diarized_segments))
 
-    # ✅ 결과 저장
-    diarized_output_path = transcript_path.replace(".txt", "_diarized.txt")
-    with open(diarized_output_path, "w", encoding="utf-8") as f:
-        for item in combined_results:
-            f.write(f"[{item['start']:.2f} - {item['end']:.2f}] Speaker {item['speaker']}: {item['text']}\n")
+def assign_speakers(segments, diarized_segments):
+    """ 변환 구간마다 겹침 시간이 가장 긴 화자(없으면 가장 가까운 화자)를 붙인 리스트 반환 """
+    index = SpeakerIndex(diarized_segments)
+    speakers = index.assign([seg["start"] for seg in segments], [seg["end"] for seg in segments])
+    return [dict(seg, speaker=speaker) for seg, speaker in zip(segments, speakers)]
+
+def write_diarized_transcript(transcript_path, combined_results):
+    """ 화자가 붙은 구간으로 구간 저장소를 갱신하고 화자 구분 녹취록(_diarized.txt)을 만들어 경로 반환 """
+    store = SegmentStore.for_transcript(transcript_path)
+    store.write(combined_results)
+    diarized_output_path = store.export_diarized(transcript_path.replace(".txt", "_diarized.txt"))
 
     print(f"✅ 화자 구분 완료! 결과 저장: {diarized_output_path}")
     return diarized_output_path
+
+def transcribe_and_diarize(audio_path, transcript_path, model_size=None, use_vad=USE_VAD, engine=None):
+    """
+    오디오를 한 번만 16kHz float32로 디코딩하고, 같은 배열로 Whisper 변환과 Pyannote 화자 분리를 동시에 실행
+    → 소요 시간이 (변환 + 화자 분리)가 아니라 max(변환, 화자 분리)
+    녹취록(.txt)과 화자 구분 녹취록(_diarized.txt)을 저장하고 (녹취록 경로, 화자 구분 녹취록 경로) 반환
+    """
+    from transcriber import transcribe_segments_local
+
+    start_time = time.time()
+    audio = load_audio_16k(audio_path)
+    print(f"🎧 오디오 디코딩 1회: {len(audio) / WHISPER_RATE:.1f}초 분량 ({time.time() - start_time:.2f}초)")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        transcribing = pool.submit(transcribe_segments_local, audio_path, model_size, use_vad, engine, audio)
+        diarizing = pool.submit(diarize_waveform, audio)
+        segments = transcribing.result()
+        diarized_segments = diarizing.result()
+
+    diarized_path = write_diarized_transcript(transcript_path, assign_speakers(segments, diarized_segments))
+    SegmentStore.for_transcript(transcript_path).export_text(transcript_path)
+    print(f"📝 변환된 텍스트 저장 완료: {transcript_path}")
+    print(f"⏳ 변환 + 화자 분리 동시 실행 완료: {round(time.time() - start_time, 2)}초")
+    return transcript_path, diarized_path
@@ -3,19 +3,25 @@ import threading
 import datetime
 import os
 import time
-import numpy as np
-import pyaudio
-from recorder import start_recording, stop_recording, get_device_index
-from transcriber import transcribe_audio_local, transcribe_audio_api
-from summarizer import summarize_text
-from config import FORMAT, CHANNELS, RATE, CHUNK
+from concurrent.futures import Future
+from audio_bus import bus
+from recorder import start_recording, stop_recording
+from transcriber import transcribe_audio_local, transcribe_audio_api, StreamingTranscriber
+from summarizer import summarize_text, IncrementalSummarizer
+from diarizer import save_diarized_transcript, transcribe_and_diarize
 from generate_pdf import generate_pdf
+from pipeline import Pipeline
+from segment_store import read_transcript_text
 
 recording = False  # 녹음 상태 변수
 latest_audio_path = ""  # 마지막으로 저장된 녹음 파일 경로
 start_time = None  # 녹음 시작 시간
 mic_volume = 0  # 마이크 볼륨 (1~100)
 transcribe_method = "local"  # 변환 방식 (local 또는 api)
+recording_done = None  # 녹음 완료 Future (파일이 닫히면 녹음 정보로 완료)
+live_transcriber = None  # 녹음 중 실시간 변환기 (로컬 변환 + 실시간 변환 선택 시)
+live_summarizer = None  # 녹음 중 실시간 요약기 (실시간 변환 결과를 받아 정리 노트 갱신)
+pipeline = Pipeline()  # 녹음 저장 → 변환 → 화자 분리 → 요약 → PDF 작업 실행기
 
 # 필요한 폴더 생성
 os.makedirs("recordings", exist_ok=True)
@@ -24,25 +30,20 @@ os.makedirs("summaries", exist_ok=True)
 os.makedirs("pdfs", exist_ok=True)
 
 def check_microphone():
+    """ 공유 캡처 버스의 최신 블록으로 볼륨 표시 (마이크 스트림을 새로 열지 않음) """
     global mic_volume
-    audio = pyaudio.PyAudio()
-    device_index = get_device_index()
-    try:
-        stream = audio.open(format=FORMAT, channels=CHANNELS,
-                            rate=RATE, input=True, input_device_index=device_index,
-                            frames_per_buffer=CHUNK)
-        data = stream.read(CHUNK, exception_on_overflow=False)
-        audio_np = np.frombuffer(data, dtype=np.int16)
-        mic_volume = max(1, min(100, int((np.max(np.abs(audio_np)) / 32768) * 100 * 10)))
-        mic_volume_label.config(text=f"🎚️ 마이크 볼륨: {mic_volume}/100")
-        stream.stop_stream()
-        stream.close()
-    except Exception as e:
+    if not bus.running and not bus.start():
         mic_volume = 0
         mic_volume_label.config(text="❌ 마이크 오류")
-        print(f"❌ 마이크 오류: {e}")
-    audio.terminate()
-    root.after(500, check_microphone)
+        root.after(2000, check_microphone)  # 장치 연결을 기다렸다가 다시 시도
+        return
+
+    levels = bus.levels()
+    if levels is not None:
+        _, peak = levels
+        mic_volume = max(1, min(100, int(peak * 100 * 10)))
+        mic_volume_label.config(text=f"🎚️ 마이크 볼륨: {mic_volume}/100")
+    root.after(200, check_microphone)
 
 def update_timer():
     if recording:
@@ -51,7 +52,7 @@ def update_timer():
         root.after(100, update_timer)
 
 def toggle_recording():
-    global recording, latest_audio_path, start_time
+    global recording, latest_audio_path, start_time, recording_done, live_transcriber, live_summarizer
     if not recording:
         print("🎤 녹음 시작 버튼 클릭됨")
         recording = True
@@ -59,9 +60,22 @@ def toggle_recording():
         record_button.config(text="중지", bg="red")
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
         latest_audio_path = f"recordings/{timestamp}.wav"
-        thread = threading.Thread(target=start_recording, args=(latest_audio_path,))
-        thread.daemon = True
-        thread.start()
+
+        # 🧠 로컬 실시간 변환: 녹음 중 무음 구간마다 잘라 백그라운드에서 미리 변환
+        # 📝 실시간 요약: 변환된 구간을 받아 정리 노트를 미리 갱신 → 종료 후 최종 정리만 남음
+        on_audio = None
+        live_transcriber = None
+        live_summarizer = None
+        if transcribe_method == "local" and live_transcribe_var.get():
+            text_path = latest_audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt")
+            live_summarizer = IncrementalSummarizer()
+            live_transcriber = StreamingTranscriber(text_path, on_segments=live_summarizer.add_segments)
+            on_audio = live_transcriber.feed
+
+        recording_done = Future()
+        recording_thread = threading.Thread(target=start_recording, args=(latest_audio_path, on_audio, recording_done))
+        recording_thread.daemon = True
+        recording_thread.start()
         update_timer()
     else:
         print("🛑 녹음 중지 버튼 클릭됨")
@@ -69,62 +83,187 @@ def toggle_recording():
         recording = False
         record_button.config(text="녹음", bg="green")
         timer_label.config(text="✅ 녹음 완료")
-        
-        # 🔄 파일이 저장될 때까지 대기 후 변환 실행
-        transcribe_thread = threading.Thread(target=wait_for_file_and_transcribe, args=(latest_audio_path,))
-        transcribe_thread.daemon = True
-        transcribe_thread.start()
-
-def wait_for_file_and_transcribe(audio_path):
-    text_path = audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt")
-    
-    # 🔄 파일이 저장될 때까지 최대 3초 대기
-    timeout = 3
-    elapsed = 0
-    while not os.path.exists(audio_path) and elapsed < timeout:
-        print(f"⏳ 파일 저장 대기 중... ({elapsed+1}/{timeout}초)")
-        time.sleep(1)
-        elapsed += 1
-    
-    if not os.path.exists(audio_path):
-        print(f"❌ 오류: 파일이 존재하지 않음 {audio_path}")
-        root.after(0, lambda: result_label.config(text="❌ 오류: 파일이 존재하지 않음"))
-        return
-    
-    # 🔥 Whisper 변환 실행
-    if transcribe_method == "local":
-        transcribed_text_path = transcribe_audio_local(audio_path, text_path)
-    else:
-        transcribed_text_path = transcribe_audio_api(audio_path, text_path)
 
-    if transcribed_text_path:
-        root.after(0, lambda: result_label.config(text=f"✅ 변환 완료: {transcribed_text_path}"))
-        root.after(0, lambda: summary_button.config(state=tk.NORMAL))
+        # 🔄 녹음 저장 → 변환 → (화자 분리) → (요약 → PDF)를 작업 파이프라인에 한 번에 등록
+        audio_path = latest_audio_path
+        text_path = audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt")
+        summary_path = audio_path.replace("recordings/", "summaries/").replace(".wav", ".txt")
+        pdf_path = audio_path.replace("recordings/", "pdfs/").replace(".wav", ".pdf")
+        steps = [("record", record_step(recording_done))]
+        if diarize_var.get() and transcribe_method == "local" and live_transcriber is None:
+            # 🧠🗣️ 오디오를 한 번만 디코딩하여 변환과 화자 분리를 동시에 실행
+            steps.append(("transcribe", transcribe_diarize_step(audio_path, text_path)))
+        else:
+            steps.append(("transcribe", transcribe_step(audio_path, text_path, transcribe_method, live_transcriber)))
+            if diarize_var.get():
+                steps.append(("diarize", diarize_step(audio_path, text_path)))
+        if auto_summary_var.get():
+            steps.append(("summarize", summarize_step(text_path, summary_path, live_summarizer)))
+            steps.append(("pdf", pdf_step(summary_path, pdf_path)))
+        pipeline.submit(os.path.basename(audio_path), steps)
+
+# -----------------------------
+# 파이프라인 단계 (작업 스레드에서 실행, 위젯은 직접 건드리지 않고 job 이벤트로만 전달)
+# -----------------------------
+def record_step(done):
+    def run(job, _):
+        """ 녹음 완료 이벤트(마지막 블록 기록, 헤더 확정, 파일 닫기)를 기다림 """
+        job.report("💾 녹음 파일 저장 대기 중...")
+        info = done.result()  # 녹음 실패 시 예외가 그대로 전달되어 작업 실패로 표시
+        job.report(f"💾 녹음 저장 완료 ({info['duration']:.1f}초)")
+        return info["path"]
+    return run
+
+def transcribe_step(audio_path, text_path, method, live=None):
+    def run(job, _):
+        if live is not None:
+            # 🧠 실시간 변환 중이었으면 남은 구간만 변환
+            job.report("🧠 남은 구간 변환 중...")
+            transcribed_text_path = live.finish()
+        elif method == "local":
+            job.report("🧠 Whisper 로컬 변환 중...")
+            transcribed_text_path = transcribe_audio_local(audio_path, text_path)
+        else:
+            job.report("☁️ OpenAI API 변환 중...")
+            transcribed_text_path = transcribe_audio_api(audio_path, text_path)
+        if not transcribed_text_path:
+            raise RuntimeError("변환 실패")
+        return transcribed_text_path
+    return run
+
+def transcribe_diarize_step(audio_path, text_path):
+    def run(job, _):
+        job.report("🧠🗣️ 변환 + 화자 분리 동시 실행 중...")
+        transcribed_text_path, _ = transcribe_and_diarize(audio_path, text_path)
+        return transcribed_text_path
+    return run
+
+def diarize_step(audio_path, text_path):
+    def run(job, _):
+        job.report("🗣️ 화자 분리 중...")
+        diarized_path = save_diarized_transcript(audio_path, text_path)
+        if not diarized_path:
+            # 화자 분리 결과가 없어도 요약은 원래 녹취록으로 계속 진행
+            job.report("⚠️ 화자 분리 결과 없음")
+        return text_path
+    return run
+
+def summarize_step(text_path, summary_path, live=None):
+    def run(job, _):
+        job.report("🧠 요약 중...")
+        transcribed_text = read_transcript_text(text_path)
+        # 실시간 요약을 진행했으면 최종 정리만 요청
+        if live is not None:
+            summarize = live.finish
+        else:
+            summarize = lambda on_token: summarize_text(transcribed_text, on_token=on_token)
+        stream_summary(job, summary_path, summarize)
+        return summary_path
+    return run
+
+def pdf_step(summary_path, pdf_path):
+    def run(job, _):
+        job.report("📄 PDF 생성 중...")
+        generate_pdf(summary_path, pdf_path)
+        return pdf_path
+    return run
+
+def stream_summary(job, summary_path, summarize):
+    """
+    요약을 스트리밍으로 받아 요약 파일에 쓰고, 도착한 조각은 job 이벤트로 요약 창에 전달 (작업 스레드에서 호출)
+    summarize: summarize(on_token) 형태로 호출할 요약 함수
+    반환값: 최종 요약 텍스트
+    """
+    job.emit("summary_start")
+    received = []
 
+    with open(summary_path, "w", encoding="utf-8") as f:
+        def on_token(token):
+            job.check_cancelled()  # 취소되면 스트리밍 중단
+            received.append(token)
+            f.write(token)
+            f.flush()
+            job.emit("token", token)
+
+        summary_text = summarize(on_token)
+    job.check_cancelled()
+
+    # 스트리밍 중 오류 등으로 최종 결과가 다르면 파일/화면을 최종 결과로 교체
+    if summary_text != "".join(received):
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(summary_text)
+        job.emit("summary_replace", summary_text)
+    return summary_text
+
+# -----------------------------
+# 파이프라인 이벤트 처리 (UI 스레드)
+# -----------------------------
+def pump_pipeline_events():
+    pipeline.poll(on_pipeline_event)
+    root.after(50, pump_pipeline_events)
+
+def on_pipeline_event(event):
+    job, kind, data = event["job"], event["kind"], event["data"]
+    if kind == "token":
+        summary_view.insert(tk.END, data)
+        summary_view.see(tk.END)
+        return
+    if kind == "summary_start":
+        summary_view.delete("1.0", tk.END)
+    elif kind == "summary_replace":
+        summary_view.delete("1.0", tk.END)
+        summary_view.insert(tk.END, data)
+    elif kind == "progress":
+        result_label.config(text=data)
+    elif kind == "stage_done":
+        stage, value = data
+        if stage == "transcribe":
+            result_label.config(text=f"✅ 변환 완료: {value}")
+            if value == latest_audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt"):
+                summary_button.config(state=tk.NORMAL)
+        elif stage == "summarize":
+            result_label.config(text=f"✅ 요약 완료: {value}")
+            if value == latest_audio_path.replace("recordings/", "summaries/").replace(".wav", ".txt"):
+                pdf_button.config(state=tk.NORMAL)  # 📄 PDF 버튼 활성화
+        elif stage == "pdf":
+            result_label.config(text=f"✅ PDF 저장 완료: {value}")
+    elif kind == "state" and job.state == "failed":
+        result_label.config(text=f"❌ 오류: {job.message}")
+    update_job_list(job)
+
+def update_job_list(job):
+    """ 작업 목록에서 해당 작업 줄만 갱신 (선택 상태 유지) """
+    index = list(pipeline.jobs).index(job.id)
+    selected = job_list.curselection()
+    while job_list.size() <= index:
+        job_list.insert(tk.END, "")
+    job_list.delete(index)
+    job_list.insert(index, job.describe())
+    for i in selected:
+        job_list.selection_set(i)
+
+def cancel_selected_job():
+    selected = job_list.curselection()
+    if not selected:
+        return
+    pipeline.cancel(list(pipeline.jobs)[selected[0]])
+
+# -----------------------------
+# 버튼 동작 (UI 스레드에서는 작업 등록만 하고 바로 반환)
+# -----------------------------
 def transcribe_test_audio():
     test_audio_path = "recordings/test.wav"
     text_path = test_audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt")
     if not os.path.exists(test_audio_path):
         result_label.config(text="❌ test.m4a 파일이 존재하지 않습니다.")
         return
-    if transcribe_method == "local":
-        transcribed_text_path = transcribe_audio_local(test_audio_path, text_path)
-    else:
-        transcribed_text_path = transcribe_audio_api(test_audio_path, text_path)
-
-    root.after(0, lambda: result_label.config(text=f"✅ 변환 완료: {transcribed_text_path}"))
+    pipeline.submit("test 변환", [("transcribe", transcribe_step(test_audio_path, text_path, transcribe_method))])
 
 def summarize_text_file():
-    global latest_audio_path
     text_path = latest_audio_path.replace("recordings/", "transcriptions/").replace(".wav", ".txt")
     summary_path = latest_audio_path.replace("recordings/", "summaries/").replace(".wav", ".txt")
-    with open(text_path, "r", encoding="utf-8") as f:
-        transcribed_text = f.read()
-    summary_text = summarize_text(transcribed_text)
-    with open(summary_path, "w", encoding="utf-8") as f:
-        f.write(summary_text)
-    root.after(0, lambda: result_label.config(text=f"✅ 요약 완료: {summary_path}"))
-    root.after(0, lambda: pdf_button.config(state=tk.NORMAL))  # 📄 PDF 버튼 활성화
+    pipeline.submit(f"{os.path.basename(latest_audio_path)} 요약",
+                    [("summarize", summarize_step(text_path, summary_path, live_summarizer))])
 
 def summarize_test_file():
     test_text_path = "transcriptions/test.txt"
@@ -133,16 +272,7 @@ def summarize_test_file():
     if not os.path.exists(test_text_path):
         result_label.config(text="❌ test.txt 파일이 존재하지 않습니다.")
         return
-    
-    with open(test_text_path, "r", encoding="utf-8") as f:
-        input_text = f.read()
-
-    summary_text = summarize_text(input_text)
-
-    with open(summary_path, "w", encoding="utf-8") as f:
-        f.write(summary_text)
-
-    result_label.config(text=f"✅ 요약 완료: {summary_path}")
+    pipeline.submit("test 요약", [("summarize", summarize_step(test_text_path, summary_path))])
 
 def set_transcribe_method(method):
     global transcribe_method
@@ -150,13 +280,9 @@ def set_transcribe_method(method):
 
 def generate_pdf_from_summary():
     """ 일반 녹음 파일의 요약본을 PDF로 변환하는 함수 """
-    global latest_audio_path
     text_path = latest_audio_path.replace("recordings/", "summaries/").replace(".wav", ".txt")
     pdf_path = latest_audio_path.replace("recordings/", "pdfs/").replace(".wav", ".pdf")
-
-    result_label.config(text="📄 PDF 생성 중...")
-    generate_pdf(text_path, pdf_path)
-    result_label.config(text=f"✅ PDF 저장 완료: {pdf_path}")
+    pipeline.submit(f"{os.path.basename(latest_audio_path)} PDF", [("pdf", pdf_step(text_path, pdf_path))])
 
 def generate_pdf_from_test_summary():
     """ test 파일의 요약본을 PDF로 변환하는 함수 """
@@ -166,15 +292,17 @@ def generate_pdf_from_test_summary():
     if not os.path.exists(test_text_path):
         result_label.config(text="❌ test_summary.txt 파일이 존재하지 않습니다.")
         return
+    pipeline.submit("test PDF", [("pdf", pdf_step(test_text_path, test_pdf_path))])
 
-    result_label.config(text="📄 PDF 생성 중 (test)...")
-    generate_pdf(test_text_path, test_pdf_path)
-    result_label.config(text=f"✅ PDF 저장 완료: {test_pdf_path}")
+def on_close():
+    pipeline.shutdown()
+    bus.stop()
+    root.destroy()
 
 # GUI 설정
 root = tk.Tk()
 root.title("음성 녹음 & 변환 & AI 요약")
-root.geometry("500x800")  # 높이를 살짝 늘려줌
+root.geometry("500x1150")  # 요약 창, 작업 목록을 위해 높이를 늘려줌
 
 mic_volume_label = tk.Label(root, text="🎚️ 마이크 볼륨: 측정 중...", font=("Arial", 12))
 mic_volume_label.pack(pady=5)
@@ -216,6 +344,35 @@ transcribe_method_var = tk.StringVar(value="local")
 tk.Radiobutton(root, text="로컬 변환", variable=transcribe_method_var, value="local", command=lambda: set_transcribe_method("local")).pack()
 tk.Radiobutton(root, text="API 변환", variable=transcribe_method_var, value="api", command=lambda: set_transcribe_method("api")).pack()
 
-# 마이크 볼륨 체크
+# 🧠 실시간 변환 (로컬 변환 시 녹음 중 미리 변환)
+live_transcribe_var = tk.BooleanVar(value=True)
+tk.Checkbutton(root, text="실시간 변환 (로컬)", variable=live_transcribe_var).pack()
+
+# 🔄 녹음 종료 후 자동 실행할 단계
+diarize_var = tk.BooleanVar(value=False)
+tk.Checkbutton(root, text="화자 분리", variable=diarize_var).pack()
+auto_summary_var = tk.BooleanVar(value=True)
+tk.Checkbutton(root, text="변환 후 자동 요약 & PDF", variable=auto_summary_var).pack()
+
+# 📋 작업 목록 (진행 중/대기 중 작업, 선택 후 취소 가능)
+job_frame = tk.Frame(root)
+job_frame.pack(fill=tk.X, padx=10, pady=5)
+job_list = tk.Listbox(job_frame, height=5, font=("Arial", 10))
+job_list.pack(side=tk.LEFT, fill=tk.X, expand=True)
+cancel_job_button = tk.Button(job_frame, text="작업 취소", font=("Arial", 11), command=cancel_selected_job)
+cancel_job_button.pack(side=tk.RIGHT, padx=5)
+
+# 📝 요약 창 (요약이 생성되는 대로 표시)
+summary_frame = tk.Frame(root)
+summary_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+summary_scrollbar = tk.Scrollbar(summary_frame)
+summary_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+summary_view = tk.Text(summary_frame, font=("Arial", 11), wrap=tk.WORD, yscrollcommand=summary_scrollbar.set)
+summary_view.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+summary_scrollbar.config(command=summary_view.yview)
+
+# 마이크 볼륨 체크 / 작업 이벤트 처리
 root.after(1000, check_microphone)
+root.after(50, pump_pipeline_events)
+root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
\ No newline at end of file
@@ -1,12 +1,230 @@
-from recorder import record_audio
-from transcriber import transcribe_audio
-import datetime
-
-# 현재 날짜/시간으로 파일 이름 설정
-timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
-audio_path = f"recordings/{timestamp}.wav"
-text_path = f"transcriptions/{timestamp}.txt"
-
-# 녹음 및 변환 실행
-record_audio(audio_path)
-transcribe_audio(audio_path, text_path)
\ No newline at end of file
+"""
+상담 녹음 일괄 처리 (GUI 없이 실행)
+- 폴더 안의 녹음 파일마다 변환 → (화자 분리) → 요약 → PDF를 여러 프로세스에서 동시에 실행
+- 진행 기록(manifest)에 파일별 결과를 바로 저장하므로, 중단 후 다시 실행하면 완료된 파일은 건너뜀
+
+실행: python main.py <녹음 폴더> [--method local|api] [--batched] [--diarize] [--no-summary] [--workers N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from config import BATCH_WORKER_MEMORY_GB, BATCH_MANIFEST_NAME
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm")
+
+
+def available_memory_bytes():
+    """ 사용 가능한 물리 메모리 (알 수 없으면 None) """
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def worker_profile(method, diarize, batched):
+    """
+    작업 프로세스가 실제로 로드하는 모델 기준 종류 (BATCH_WORKER_MEMORY_GB 키)
+    - local: 프로세스에서 Whisper 로컬 변환 (+ 화자 분리)
+    - diarize: 변환은 API 또는 일괄 변환(--batched)으로 끝내고 화자 분리 모델만 로드
+    - api: 모델 없이 API 호출 (요약/PDF)만
+    """
+    if method == "local" and not batched:
+        return "local"
+    return "diarize" if diarize else "api"
+
+
+def default_workers(profile):
+    """ CPU 코어 수와 남은 메모리로 동시 실행 프로세스 수 결정 """
+    cores = os.cpu_count() or 1
+    workers = cores if profile == "api" else max(1, cores // 4)  # 모델 추론은 프로세스마다 여러 스레드 사용
+    memory = available_memory_bytes()
+    if memory is not None:
+        workers = min(workers, max(1, int(memory // (BATCH_WORKER_MEMORY_GB[profile] * 1024 ** 3))))
+    return max(1, workers)
+
+
+def init_worker(profile, threads):
+    """ 작업 프로세스 초기화: 모델을 실행하면 프로세스당 연산 스레드 수 제한 (프로세스끼리 코어를 나눠 씀) """
+    if profile != "api":
+        import torch
+        torch.set_num_threads(threads)
+
+
+class Manifest:
+    """
+    일괄 처리 진행 기록 (JSON)
+    - 파일별 상태(done/failed), 결과 경로, 오디오 길이, 처리 시간 저장
+    - 원본 파일 크기/수정 시각도 함께 저장하여 파일이 바뀌면 다시 처리
+    - 결과가 나올 때마다 임시 파일에 쓴 뒤 교체하므로 중간에 종료되어도 깨지지 않음
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+
+    @staticmethod
+    def fingerprint(audio_path):
+        st = os.stat(audio_path)
+        return {"size": st.st_size, "mtime": st.st_mtime}
+
+    def is_done(self, audio_path):
+        entry = self.entries.get(os.path.basename(audio_path))
+        return (entry is not None and entry["status"] == "done"
+                and entry["source"] == self.fingerprint(audio_path))
+
+    def record(self, audio_path, entry):
+        entry["source"] = self.fingerprint(audio_path)
+        self.entries[os.path.basename(audio_path)] = entry
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def transcript_path(output_dir, audio_path):
+    name = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(output_dir, "transcriptions", f"{name}.txt")
+
+
+def process_file(audio_path, output_dir, method, diarize, summarize, engine=None, transcribed=False):
+    """
+    작업 프로세스에서 실행: 녹음 파일 하나를 끝까지 처리하고 결과 정보 dict 반환
+    transcribed: 일괄 변환(--batched)으로 녹취록이 이미 만들어졌으면 변환 단계 생략
+    """
+    from audio_io import audio_duration
+    from transcriber import transcribe_audio_local, transcribe_audio_api
+
+    start_time = time.time()
+    name = os.path.splitext(os.path.basename(audio_path))[0]
+    text_path = transcript_path(output_dir, audio_path)
+    summary_path = os.path.join(output_dir, "summaries", f"{name}.txt")
+    pdf_path = os.path.join(output_dir, "pdfs", f"{name}.pdf")
+    outputs = {}
+
+    if transcribed:
+        outputs["transcript"] = text_path
+    elif method == "local" and diarize:
+        # 한 번 디코딩한 오디오로 변환과 화자 분리를 동시에 실행
+        from diarizer import transcribe_and_diarize
+        outputs["transcript"], outputs["diarized"] = transcribe_and_diarize(audio_path, text_path, engine=engine)
+        diarize = False
+    elif method == "local":
+        outputs["transcript"] = transcribe_audio_local(audio_path, text_path, engine=engine)
+    else:
+        outputs["transcript"] = transcribe_audio_api(audio_path, text_path)
+    if not outputs["transcript"]:
+        raise RuntimeError("변환 실패")
+
+    if diarize:
+        from diarizer import save_diarized_transcript
+        outputs["diarized"] = save_diarized_transcript(audio_path, text_path)
+
+    if summarize:
+        from summarizer import summarize_text
+        from generate_pdf import generate_pdf
+        from segment_store import read_transcript_text
+        summary = summarize_text(read_transcript_text(text_path))
+        if summary == "요약 실패":
+            raise RuntimeError("요약 실패")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(summary)
+        generate_pdf(summary_path, pdf_path)
+        outputs["summary"], outputs["pdf"] = summary_path, pdf_path
+
+    return {
+        "status": "done",
+        "outputs": outputs,
+        "audio_seconds": audio_duration(audio_path),
+        "processing_seconds": round(time.time() - start_time, 2),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="상담 녹음 폴더 일괄 변환/요약")
+    parser.add_argument("input_dir", help="녹음 파일 폴더")
+    parser.add_argument("--output-dir", default=".", help="결과 폴더 (transcriptions/, summaries/, pdfs/ 생성, 기본: 현재 폴더)")
+    parser.add_argument("--method", choices=("local", "api"), default="local", help="변환 방식 (기본: local)")
+    parser.add_argument("--engine", default=None, help="로컬 변환 엔진 (torch / torch-int8 / faster-whisper, 기본: config.WHISPER_ENGINE)")
+    parser.add_argument("--batched", action="store_true",
+                        help="로컬 변환을 여러 파일의 30초 창을 묶어 한 번에 실행 (변환 후 나머지 단계는 프로세스별로 진행)")
+    parser.add_argument("--diarize", action="store_true", help="화자 분리 포함")
+    parser.add_argument("--no-summary", action="store_true", help="요약/PDF 생략")
+    parser.add_argument("--workers", type=int, default=None, help="동시 실행 프로세스 수 (기본: 코어 수와 메모리로 자동 결정)")
+    parser.add_argument("--manifest", default=None, help=f"진행 기록 파일 (기본: <녹음 폴더>/{BATCH_MANIFEST_NAME})")
+    parser.add_argument("--retry-failed", action="store_true", help="이전 실행에서 실패한 파일만 다시 처리")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for folder in ("transcriptions", "summaries", "pdfs"):
+        os.makedirs(os.path.join(args.output_dir, folder), exist_ok=True)
+
+    manifest = Manifest(args.manifest or os.path.join(args.input_dir, BATCH_MANIFEST_NAME))
+    audio_files = sorted(os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+                         if name.lower().endswith(AUDIO_EXTENSIONS))
+    pending = [path for path in audio_files if not manifest.is_done(path)]
+    if args.retry_failed:
+        pending = [path for path in pending if os.path.basename(path) in manifest.entries]
+    print(f"📂 녹음 파일 {len(audio_files)}개 중 {len(audio_files) - len(pending)}개 완료됨, {len(pending)}개 처리 예정")
+    if not pending:
+        return 0
+
+    start_time = time.time()
+    batched = args.batched and args.method == "local"
+    if batched:
+        # 🧠 변환은 이 프로세스에서 모델 하나로 모든 파일의 창을 묶어 처리
+        from batch_transcriber import transcribe_files_batched
+        batch_start = time.time()
+        results = transcribe_files_batched(pending, [transcript_path(args.output_dir, path) for path in pending],
+                                           engine=args.engine)
+        for path, segments in zip(pending, results):
+            if segments is None:
+                manifest.record(path, {"status": "failed", "error": "일괄 변환 실패"})
+        pending = [path for path, segments in zip(pending, results) if segments is not None]
+        print(f"⏳ 일괄 변환 {round(time.time() - batch_start, 2)}초")
+        if not pending:
+            return 1
+
+    profile = worker_profile(args.method, args.diarize, batched)
+    workers = args.workers or default_workers(profile)
+    workers = min(workers, len(pending))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🚀 작업 프로세스 {workers}개 (프로세스당 연산 스레드 {threads}개, 변환 방식: {args.method}, 작업 종류: {profile})")
+
+    audio_seconds = 0.0
+    failed = 0
+    # spawn: 부모 프로세스의 스레드/CUDA 상태를 물려받지 않도록 새 인터프리터로 시작
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                             initializer=init_worker, initargs=(profile, threads)) as pool:
+        futures = {pool.submit(process_file, path, args.output_dir, args.method,
+                               args.diarize, not args.no_summary, args.engine, batched): path for path in pending}
+        for done_count, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                entry = future.result()
+                audio_seconds += entry["audio_seconds"]
+                print(f"✅ [{done_count}/{len(pending)}] {os.path.basename(path)} "
+                      f"({entry['audio_seconds'] / 60:.1f}분 → {entry['processing_seconds']}초)")
+            except Exception as e:
+                failed += 1
+                entry = {"status": "failed", "error": str(e)}
+                print(f"❌ [{done_count}/{len(pending)}] {os.path.basename(path)}: {e}")
+            manifest.record(path, entry)
+
+    wall_seconds = time.time() - start_time
+    print(f"\n📊 처리 완료: 성공 {len(pending) - failed}개 / 실패 {failed}개, 총 {wall_seconds / 60:.1f}분 소요")
+    print(f"⚡ 처리량: 오디오 {audio_seconds / 3600:.2f}시간 / 실제 {wall_seconds / 3600:.2f}시간 "
+          f"= {audio_seconds / wall_seconds if wall_seconds else 0:.1f}배속")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
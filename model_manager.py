@@ -0,0 +1,207 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from config import MODEL_SIZE, MODEL_RAM_BUDGET_GB, DIARIZATION_MODEL, FASTER_WHISPER_COMPUTE_TYPE, WHISPER_CPU_THREADS
+
+# .env 파일에서 Hugging Face Access Token 로드
+load_dotenv()
+HF_TOKEN = os.getenv("HUGGINGFACE_ACCESS_TOKEN")
+
+
+def default_device():
+    """ GPU 사용 가능 여부 확인 """
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _load_whisper(size, device):
+    import whisper
+    return whisper.load_model(size, device=device)
+
+
+def _load_whisper_int8(size, device):
+    """ Whisper 모델의 Linear 층을 int8 동적 양자화 (CPU 전용, 가중치 약 1/4, 행렬곱은 int8 커널) """
+    import torch
+    import whisper
+    model = whisper.load_model(size, device="cpu")
+    # whisper.model.Linear는 입력 dtype에 맞춰 가중치를 변환하는 nn.Linear 하위 클래스 → 양자화 대상이 되도록 nn.Linear로 교체
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def faster_whisper_compute_type(device):
+    """ 장치에 맞춘 faster-whisper 연산 형식 (config.FASTER_WHISPER_COMPUTE_TYPE 기준) """
+    if device == "cuda" and FASTER_WHISPER_COMPUTE_TYPE == "int8":
+        return "int8_float16"  # GPU는 int8 가중치 + fp16 연산
+    return FASTER_WHISPER_COMPUTE_TYPE
+
+
+def _load_faster_whisper(size, device):
+    """ CTranslate2 기반 faster-whisper 모델 (선택 설치: pip install faster-whisper) """
+    from faster_whisper import WhisperModel
+    return WhisperModel(size, device=device, compute_type=faster_whisper_compute_type(device),
+                        cpu_threads=WHISPER_CPU_THREADS)
+
+
+def _load_pyannote(size, device):
+    import torch
+    from pyannote.audio.pipelines import SpeakerDiarization
+    pipeline = SpeakerDiarization.from_pretrained(size, use_auth_token=HF_TOKEN)
+    pipeline.to(torch.device(device))
+    return pipeline
+
+
+def _estimate_bytes(model):
+    """ 모델(또는 Pyannote 파이프라인 내부 모듈)의 파라미터/버퍼 메모리 합계 (바이트) """
+    import torch
+
+    modules = []
+    pending = [model]
+    seen = set()
+    # Pyannote 파이프라인은 nn.Module이 아니므로 속성을 두 단계까지 따라가며 내부 모델을 찾음
+    for _ in range(3):
+        next_pending = []
+        for obj in pending:
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            if isinstance(obj, torch.nn.Module):
+                modules.append(obj)
+            elif hasattr(obj, "__dict__"):
+                next_pending.extend(vars(obj).values())
+        pending = next_pending
+
+    total = 0
+    counted = set()
+    for module in modules:
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if id(tensor) not in counted:
+                counted.add(id(tensor))
+                total += tensor.numel() * tensor.element_size()
+        # 동적 양자화 Linear의 int8 가중치는 파라미터가 아니라 packed params로 보관됨
+        for sub in module.modules():
+            if isinstance(sub, torch.ao.nn.quantized.dynamic.Linear) and id(sub) not in counted:
+                counted.add(id(sub))
+                weight, bias = sub._weight_bias()
+                total += weight.numel() * weight.element_size()
+                total += 0 if bias is None else bias.numel() * bias.element_size()
+    return total
+
+
+class ModelManager:
+    """
+    Whisper / Pyannote 모델을 처음 사용할 때 로드하고 (이름, 크기, 장치) 단위로 캐시
+    - 전체 메모리가 예산(budget_bytes)을 넘으면 가장 오래 사용하지 않은 모델부터 해제 (LRU)
+    - 로드/해제 소요 시간을 기록하여 stats()로 확인 가능
+    - 로드는 전체 잠금 밖에서 실행하므로 서로 다른 모델은 동시에 로드되고, 같은 모델을 동시에 요청하면 한 번만 로드
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._loaders = {"whisper": _load_whisper, "whisper-int8": _load_whisper_int8,
+                         "faster-whisper": _load_faster_whisper, "pyannote": _load_pyannote}
+        self._models = OrderedDict()  # (name, size, device) → (model, bytes)
+        self._loading = {}  # (name, size, device) → 로드 중인 모델의 Future
+        self._lock = threading.RLock()
+        self._load_times = []
+        self._evict_times = []
+
+    def register_loader(self, name, loader):
+        """ loader(size, device) 형태의 로더 함수 등록 """
+        self._loaders[name] = loader
+
+    def get(self, name, size, device=None):
+        device = device or default_device()
+        key = (name, size, device)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            future = self._loading.get(key)
+            loading_here = future is None
+            if loading_here:
+                future = self._loading[key] = Future()
+        if not loading_here:
+            # 다른 스레드가 같은 모델을 로드 중이면 그 결과를 기다림
+            return future.result()
+
+        print(f"📦 모델 로드 중: {name} ({size}, {device})")
+        start_time = time.time()
+        try:
+            model = self._loaders[name](size, device)
+            nbytes = _estimate_bytes(model)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        load_seconds = round(time.time() - start_time, 2)
+
+        with self._lock:
+            self._models[key] = (model, nbytes)
+            del self._loading[key]
+            self._load_times.append({"model": key, "seconds": load_seconds, "bytes": nbytes})
+            self._evict_over_budget(keep=key)
+        future.set_result(model)
+        print(f"✅ 모델 로드 완료: {name} ({size}) - {load_seconds}초, {nbytes / 1024 ** 3:.2f}GB")
+        return model
+
+    def _evict_over_budget(self, keep):
+        while self.total_bytes() > self.budget_bytes:
+            victim = next((k for k in self._models if k != keep), None)
+            if victim is None:
+                break
+            self.evict(*victim)
+
+    def evict(self, name, size, device):
+        key = (name, size, device)
+        with self._lock:
+            if key not in self._models:
+                return False
+            start_time = time.time()
+            _, nbytes = self._models.pop(key)
+            gc.collect()
+            if device == "cuda":
+                import torch
+                torch.cuda.empty_cache()
+            evict_seconds = round(time.time() - start_time, 2)
+            self._evict_times.append({"model": key, "seconds": evict_seconds, "bytes": nbytes})
+            print(f"♻️ 모델 해제: {name} ({size}) - {evict_seconds}초")
+            return True
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._models):
+                self.evict(*key)
+
+    def total_bytes(self):
+        return sum(nbytes for _, nbytes in self._models.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": [{"model": k, "bytes": b} for k, (_, b) in self._models.items()],
+                "total_bytes": self.total_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "loads": list(self._load_times),
+                "evictions": list(self._evict_times),
+            }
+
+
+manager = ModelManager(int(MODEL_RAM_BUDGET_GB * 1024 ** 3))
+
+
+def get_whisper_model(size=None, device=None):
+    """ Whisper 모델 반환 (기본 크기: config.MODEL_SIZE) """
+    return manager.get("whisper", size or MODEL_SIZE, device)
+
+
+def get_diarization_pipeline(model_id=None, device=None):
+    """ Pyannote 화자 분리 파이프라인 반환 (기본: config.DIARIZATION_MODEL) """
+    return manager.get("pyannote", model_id or DIARIZATION_MODEL, device)
@@ -0,0 +1,141 @@
+import itertools
+import queue
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import PIPELINE_STAGE_WORKERS
+
+STAGE_NAMES = {"record": "녹음 저장", "transcribe": "변환", "diarize": "화자 분리", "summarize": "요약", "pdf": "PDF"}
+STATE_NAMES = {"queued": "⏳ 대기", "running": "▶️ 실행 중", "done": "✅ 완료", "failed": "❌ 실패", "cancelled": "🚫 취소"}
+
+
+class JobCancelled(Exception):
+    """ 취소된 작업의 단계 함수에서 발생 (job.check_cancelled()) """
+
+
+class Job:
+    """
+    녹음 하나(또는 테스트 파일 하나)에 대한 단계 체인
+    - steps: [(단계 이름, fn(job, 이전 단계 결과)), ...] 순서대로 실행, 각 단계의 반환값이 다음 단계 입력
+    - 단계 함수는 job.report()로 진행 상황을, job.emit("token", ...)으로 스트리밍 조각을 UI에 전달
+    - 취소는 협조 방식: 단계 사이에서 자동으로 확인하고, 긴 단계는 job.check_cancelled()로 중간에 확인
+    """
+
+    def __init__(self, job_id, name, steps, pipeline):
+        self.id = job_id
+        self.name = name
+        self.steps = steps
+        self.state = "queued"
+        self.stage = steps[0][0]
+        self.message = ""
+        self.result = None
+        self.error = None
+        self._pipeline = pipeline
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(f"작업 취소: {self.name}")
+
+    def emit(self, kind, data=None):
+        self._pipeline.events.put({"job": self, "kind": kind, "data": data})
+
+    def report(self, message):
+        self.message = message
+        self.emit("progress", message)
+
+    def describe(self):
+        text = f"#{self.id} {self.name} | {STATE_NAMES[self.state]} ({STAGE_NAMES.get(self.stage, self.stage)})"
+        return f"{text} - {self.message}" if self.message else text
+
+
+class Pipeline:
+    """
+    단계별 작업 풀과 의존 체인으로 작업 실행 (UI 스레드에서는 아무것도 기다리지 않음)
+    - 단계마다 크기가 정해진 ThreadPoolExecutor (예: 변환 1개, 요약 2개) → 무거운 단계가 서로 자원을 다투지 않음
+    - 한 단계가 끝나면 결과를 들고 다음 단계 풀에 바로 제출
+    - 진행 이벤트는 큐에 쌓이고, UI 스레드가 poll()로 꺼내 처리 (Tk 위젯은 UI 스레드에서만 변경)
+    """
+
+    def __init__(self, stage_workers=None):
+        stage_workers = stage_workers or PIPELINE_STAGE_WORKERS
+        self._pools = {stage: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"pipeline-{stage}")
+                       for stage, n in stage_workers.items()}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.events = queue.Queue()
+
+    def submit(self, name, steps, initial=None):
+        """ 단계 체인 제출, Job 반환 (첫 단계 풀에 바로 들어감) """
+        with self._lock:
+            job = Job(next(self._ids), name, steps, self)
+            self.jobs[job.id] = job
+        job.emit("state")
+        self._pools[steps[0][0]].submit(self._run_step, job, 0, initial)
+        return job
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state, job.result, job.error = state, result, error
+        if state == "cancelled":
+            job.message = ""
+        elif error is not None:
+            job.message = str(error)
+        job.emit("state")
+
+    def _run_step(self, job, index, value):
+        stage, fn = job.steps[index]
+        if job.cancelled:
+            self._finish(job, "cancelled")
+            return
+        job.state, job.stage, job.message = "running", stage, ""
+        job.emit("state")
+        try:
+            value = fn(job, value)
+            job.check_cancelled()
+        except JobCancelled:
+            print(f"🚫 작업 취소: #{job.id} {job.name} ({STAGE_NAMES.get(stage, stage)})")
+            self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            print(f"❌ 작업 실패: #{job.id} {job.name} ({STAGE_NAMES.get(stage, stage)}) - {e}")
+            traceback.print_exc()
+            self._finish(job, "failed", error=e)
+            return
+
+        job.emit("stage_done", (stage, value))
+        if index + 1 == len(job.steps):
+            self._finish(job, "done", result=value)
+            return
+        job.state, job.stage = "queued", job.steps[index + 1][0]
+        job.emit("state")
+        self._pools[job.stage].submit(self._run_step, job, index + 1, value)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None and job.state in ("queued", "running"):
+            job.cancel()
+            job.report("취소 요청됨")
+
+    def poll(self, handler, max_events=200):
+        """ UI 스레드에서 호출: 쌓인 이벤트를 handler(event)로 처리 (한 번에 최대 max_events개) """
+        for _ in range(max_events):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            handler(event)
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            job.cancel()
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,69 +1,83 @@
 import pyaudio
-import wave
 import time
 import threading
-from config import RECORD_SECONDS, RATE, CHUNK, CHANNELS, FORMAT
+import numpy as np
+from config import RECORD_SECONDS, RATE, CHANNELS, FORMAT, WAV_HEADER_INTERVAL, ARCHIVE_ORIGINAL_RATE
+from audio_io import WavStreamWriter, Resampler, WHISPER_RATE
+from audio_bus import bus
 
 recording = False  # 녹음 상태 변수
 
-def get_device_index():
-    """ 기본 입력 가능한 마이크 장치 찾기 """
-    audio = pyaudio.PyAudio()
-    for i in range(audio.get_device_count()):
-        dev = audio.get_device_info_by_index(i)
-        if dev['maxInputChannels'] > 0:
-            return i  # 첫 번째 사용 가능한 마이크 선택
-    return None
+def start_recording(output_file, on_audio=None, done=None):
+    """
+    녹음 시작 함수 (공유 캡처 버스에서 블록을 받아 기록, 마이크 장치를 따로 열지 않음)
+    on_audio: 저장되는 블록마다 on_audio(int16 배열, 샘플링 레이트) 호출 (실시간 변환 등)
+              원본 레이트 보관 시에는 링 버퍼를 가리키는 뷰이므로, 보관하려면 복사해야 함
+    done: concurrent.futures.Future를 넘기면 파일을 닫아 헤더까지 확정된 뒤 녹음 정보로 완료
+          {"path", "duration", "rate", "channels", "frames", "dropped"} (실패 시 예외로 완료)
+          → 후속 단계는 파일이 생길 때까지 폴링하지 않고 done.result()만 기다림
+    """
+    try:
+        info = _record(output_file, on_audio)
+    except Exception as e:
+        print(f"❌ 녹음 실패: {e}")
+        if done is not None:
+            done.set_exception(e)
+        return None
+    if done is not None:
+        done.set_result(info)
+    return info
 
-def start_recording(output_file):
-    """ 녹음 시작 함수 """
+def _record(output_file, on_audio):
     global recording
     recording = True  # 녹음 시작 상태 설정
 
-    audio = pyaudio.PyAudio()
-    device_index = get_device_index()
-    print(f"🎤 선택된 마이크 장치: {device_index}")
-
-    if device_index is None:
-        print("❌ 사용 가능한 마이크가 없습니다.")
-        return
-
-    try:
-        stream = audio.open(format=FORMAT, channels=CHANNELS,
-                            rate=RATE, input=True, input_device_index=device_index,
-                            frames_per_buffer=CHUNK)
-    except Exception as e:
-        print(f"❌ 마이크 오류 발생: {e}")
-        return
+    if not bus.start():
+        raise RuntimeError(bus.error)
+    subscription = bus.subscribe()
 
     print("🎤 녹음 시작...")
-    frames = []
+    # 프레임을 메모리에 모으지 않고 도착 즉시 파일에 기록 (비정상 종료 시에도 재생 가능한 WAV 유지)
+    # 기본은 녹음 스레드에서 바로 16kHz 모노로 변환하여 저장 (파일 크기 약 1/2.75, 후속 단계 리샘플링 생략)
+    if ARCHIVE_ORIGINAL_RATE:
+        resampler = None
+        writer = WavStreamWriter(output_file, CHANNELS, pyaudio.get_sample_size(FORMAT), RATE,
+                                 header_interval=WAV_HEADER_INTERVAL)
+    else:
+        resampler = Resampler(RATE, WHISPER_RATE, channels=CHANNELS)
+        writer = WavStreamWriter(output_file, 1, pyaudio.get_sample_size(FORMAT), WHISPER_RATE,
+                                 header_interval=WAV_HEADER_INTERVAL)
+    stored_rate = RATE if resampler is None else WHISPER_RATE
     start_time = time.time()
 
-    while recording:
-        data = stream.read(CHUNK, exception_on_overflow=False)
-        frames.append(data)
+    try:
+        while recording and bus.running:
+            for data in subscription.read():
+                block = resampler.process(data) if resampler else np.frombuffer(data, dtype=np.int16)
+                writer.write(block)
+                if on_audio is not None:
+                    on_audio(block, stored_rate)
 
-        elapsed_time = round(time.time() - start_time, 2)
-        print(f"⏳ 녹음 중... {elapsed_time}s", end="\r", flush=True)
+            elapsed_time = round(time.time() - start_time, 2)
+            print(f"⏳ 녹음 중... {elapsed_time}s", end="\r", flush=True)
+    finally:
+        writer.close()
 
     end_time = time.time()
     recorded_seconds = round(end_time - start_time, 2)
 
     print(f"\n🛑 녹음 완료. 실제 녹음 시간: {recorded_seconds}초")
-
-    stream.stop_stream()
-    stream.close()
-    audio.terminate()
-
-    # WAV 파일 저장
-    with wave.open(output_file, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-
+    if subscription.dropped:
+        print(f"⚠️ 처리 지연으로 누락된 블록: {subscription.dropped}개")
     print(f"📁 파일 저장 완료: {output_file}")
+    return {
+        "path": output_file,
+        "duration": writer.duration,
+        "rate": stored_rate,
+        "channels": 1 if resampler else CHANNELS,
+        "frames": writer.frames_written,
+        "dropped": subscription.dropped,
+    }
 
 def stop_recording():
     """ 녹음 중지 함수 """
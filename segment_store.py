@@ -0,0 +1,105 @@
+import json
+import mmap
+import os
+import threading
+
+FIELDS = ("start", "end", "text", "speaker", "confidence")
+
+
+def store_path_for(transcript_path):
+    """ 녹취록 텍스트 경로(transcriptions/이름.txt)에 대응하는 구간 저장소 경로 (transcriptions/이름.segments.jsonl) """
+    return os.path.splitext(transcript_path)[0] + ".segments.jsonl"
+
+
+class SegmentStore:
+    """
+    변환 구간 저장소 (JSONL, 한 줄에 구간 하나: start, end, text, speaker, confidence)
+    - 변환 단계는 구간이 나오는 대로 append()로 이어 쓰고, 전체 결과는 write()로 한 번에 교체 (임시 파일 후 교체)
+    - 읽기는 mmap으로 파일을 통째로 복사하지 않고 줄 단위로 읽음, 쓰다 만 마지막 줄(비정상 종료)은 건너뜀
+    - 녹취록(.txt)과 화자 구분 녹취록(_diarized.txt)은 필요할 때 저장소에서 만들어 냄 (텍스트를 다시 파싱하지 않음)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_transcript(cls, transcript_path):
+        return cls(store_path_for(transcript_path))
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @staticmethod
+    def _record(segment):
+        return {key: segment[key] for key in FIELDS if segment.get(key) is not None}
+
+    def append(self, segments):
+        """ 구간 이어 쓰기 (실시간 변환 등에서 구간이 나올 때마다 호출) """
+        lines = "".join(json.dumps(self._record(seg), ensure_ascii=False) + "\n" for seg in segments)
+        with self._lock:
+            with open(self.path, "ab+") as f:
+                # 비정상 종료로 쓰다 만 줄이 있으면 새 줄에서 시작 (깨진 줄은 읽을 때 건너뜀)
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        lines = "\n" + lines
+                f.write(lines.encode("utf-8"))
+                f.flush()
+
+    def write(self, segments):
+        """ 전체 구간을 새로 기록 (임시 파일에 쓴 뒤 교체하여 읽는 쪽이 중간 상태를 보지 않음) """
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seg in segments:
+                f.write(json.dumps(self._record(seg), ensure_ascii=False) + "\n")
+        with self._lock:
+            os.replace(tmp_path, self.path)
+
+    def __iter__(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b""):
+                    if not line.endswith(b"\n"):
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # 비정상 종료로 중간에 끊긴 줄
+
+    def read(self):
+        return list(self)
+
+    def text(self):
+        """ 구간 텍스트만 줄 단위로 이은 녹취록 문자열 """
+        return "\n".join(seg["text"] for seg in self)
+
+    def export_text(self, transcript_path=None):
+        """ 녹취록 텍스트 파일(.txt) 생성, 경로 반환 """
+        transcript_path = transcript_path or self.path.replace(".segments.jsonl", ".txt")
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            f.write(self.text())
+        return transcript_path
+
+    def export_diarized(self, diarized_path=None):
+        """ 화자 구분 녹취록 파일(_diarized.txt) 생성, 경로 반환 """
+        diarized_path = diarized_path or self.path.replace(".segments.jsonl", "_diarized.txt")
+        with open(diarized_path, "w", encoding="utf-8") as f:
+            for seg in self:
+                f.write(f"[{seg['start']:.2f} - {seg['end']:.2f}] Speaker {seg.get('speaker', 'Unknown')}: {seg['text']}\n")
+        return diarized_path
+
+
+def read_transcript_text(transcript_path):
+    """ 녹취록 텍스트 (구간 저장소가 있으면 저장소에서, 없으면 직접 만든 .txt 파일에서 읽음) """
+    store = SegmentStore.for_transcript(transcript_path)
+    if store.exists():
+        return store.text()
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        return f.read()
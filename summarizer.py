@@ -1,6 +1,13 @@
 import openai
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from config import (SUMMARY_MODEL, SUMMARY_SINGLE_PASS_TOKENS, SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_WORKERS,
+                    SUMMARY_CACHE_DIR, SUMMARY_CACHE_MAX_MB, SUMMARY_INCREMENTAL_BLOCK_TOKENS,
+                    SUMMARY_CONTEXT_TOKENS, SUMMARY_MAX_OUTPUT_TOKENS)
+from disk_cache import DiskCache, make_key
+from token_budget import count_tokens, count_message_tokens, choose_strategy, TokenLedger
 
 # .env 파일 로드
 load_dotenv()
@@ -8,72 +15,286 @@ load_dotenv()
 # OpenAI API 키 설정
 api_key = os.getenv("OPENAI_API_KEY")
 
-# OpenAI 클라이언트 초기화
-client = openai.OpenAI(api_key=api_key)
+# OpenAI 클라이언트 초기화 (OPENAI_BASE_URL을 지정하면 로컬 테스트 서버 등 다른 엔드포인트로 요청)
+client = openai.OpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL"))
 
-def summarize_text(input_text):
-    """ OpenAI GPT-4o 모델을 사용하여 상담 내용을 체계적으로 정리하는 함수 """
-    try:
+# 상담 정리용 시스템 프롬프트
+# 모든 요청의 첫 메시지로 항상 그대로 보내므로(단계별 안내는 두 번째 메시지), 프롬프트 앞부분이
+# 요청마다 바이트 단위로 동일하게 유지되어 제공자 측 프롬프트 캐시가 적용됨
+
+SYSTEM_PROMPT = (
+    "당신은 **인테리어 디자인 전문가**입니다. "
+    "주어진 상담 내용을 **세부적으로 정리**하고, **누락 없이 모든 정보를 포함**해야 합니다. "
+    "이는 단순 요약이 아니라, **회의록 수준의 정리**이며, 모든 숫자, 금액, 일정, 고객 의견 등을 **빠짐없이** 기록해야 합니다.\n\n"
+
+    "💡 **정리 규칙**\n"
+    "**1. 인테리어 디자인 맥락에 맞게 단어를 자동 교정하세요.**\n"
+    "**2. 원본 대화에는 화자가 지정되어 있지 않습니다. 따라서 **자동으로 고객과 디자이너의 화자를 구분하여 정리하세요**.\n"
+    "**3. 대화 흐름을 유지하며, 논의 과정과 결론까지 포함하여 **상세하게 정리**할 것.\n"
+    "**4. 상담 내용을 아래 정리 형식 예시에 맞춰 정리하세요.**\n"
+    "**5. 상담 중 등장한 숫자, 금액, 일정, 제품명, 브랜드명 등을 **절대 생략하지 말 것**.\n"
+    "**6. 고객의 고민, 선택 과정, 최종 결정까지 상세히 기록할 것.\n"
+    "**7. 중요 항목은 **강조 표시** (예: 금액, 일정, 고객의 최종 결정 등)\n\n"
+    "**8. 상담 내용에서 논의된 주제의 개수는 정해져 있지 않으며, 모든 주제를 자동으로 정리하세요.**\n\n"
+    "**9. 상담 내용을 아래 정리 형식 예시에 맞춰 정리하세요.**\n\n"
+
+    "📌 **정리 형식 예시**\n"
+    "### 상담 개요\n"
+    "- 고객이 기존 아파트 리모델링을 위해 방문 상담 진행.\n"
+    "- 주방, 욕실, 창호 교체 및 거실 조명 변경 등을 논의.\n"
+    "- 초기 예산 1,000만 원, 확장 가능성 있음.\n"
+    "- 가족 구성원: 부부 + 7세 자녀 1명, 반려견 1마리.\n\n"
+
+    "### 세부 상담 내용\n"
+    "**1. 주방 리모델링**\n"
+    "- 고객 요청: ‘한샘’과 ‘LG’ 싱크대 비교 후 결정.\n"
+    "- 기존 싱크대 철거 비용: 약 **30만 원** 예상.\n"
+    "- 후드: ‘린나이 자동센서 후드’ 추천, 가격 **45만 원**.\n"
+    "- 조리대 소재: 엔지니어드 스톤 (한샘 기준 **약 150만 원**)\n\n"
+
+    "**2. 욕실 개선**\n"
+    "- 브랜드: 대림 바스 제품 우선 검토.\n"
+    "- 추가 옵션: ‘웰스 코팅’ 가능 (비용: **15만 원 추가**).\n"
+    "- 타일 변경 시 비용 증가 가능성 있음 (평균 **200만 원 예상**).\n\n"
+
+    "**3. 창호 교체**\n"
+    "- LG 샤시 246mm 교체 가능 여부 확인 중.\n"
+    "- 거실 창 전체 교체 시 예상 비용 **320만 원**.\n"
+    "- 추가로 방 창도 교체할 경우 **총 450만 원** 예상.\n\n"
+
+    "(주제가 많을 경우 자동으로 확장되며, 모든 내용을 포함해야 함.)\n\n"
+
+    "### 결정해야 할 사항\n"
+    "- 고객과 전문가가 최종적으로 결정해야 할 사항 (예: 마감재 선택, 예산 조정, 일정 확정 등)\n"
+    "- 아직 결론이 나지 않은 논의 사항\n\n"
+
+    "### 결정된 사항\n"
+    "- 상담 중 최종 결정된 내용 (예: 벽지 색상, 바닥재 선택, 공사 일정 등)\n"
+    "- 확정된 일정 및 예산\n\n"
+
+    "위와 같은 형식으로 상담 내용을 최대한 **자세히 기록**하고, 모든 정보를 포함해야 합니다."
+)
+
+# map 단계 안내: 긴 상담의 일부 구간을 최종 병합용 상세 노트로 정리
+MAP_PROMPT = (
+    "📌 **이번 요청 안내 (위 정리 형식보다 우선)**\n"
+    "주어진 텍스트는 긴 상담 녹취록의 **일부 구간**입니다. 이 구간의 내용을 나중에 다른 구간과 합쳐 "
+    "회의록으로 정리할 수 있도록 **상세 노트**로 정리하세요.\n\n"
+    "💡 **정리 규칙**\n"
+    "**1. 인테리어 디자인 맥락에 맞게 단어를 자동 교정하세요.**\n"
+    "**2. 숫자, 금액, 일정, 제품명, 브랜드명, 치수 등은 **절대 생략하지 말 것**.\n"
+    "**3. 논의된 주제별로 '- ' 글머리표 목록으로 정리하고, 고객 요청·고민·결정 여부를 구분하여 기록할 것.\n"
+    "**4. 이 구간에서 결정된 사항과 아직 결정되지 않은 사항을 마지막에 따로 표시할 것.\n"
+    "**5. 구간 밖의 내용을 추측하지 말 것."
+)
+
+# reduce 단계 안내문
+REDUCE_INSTRUCTION = (
+    "아래는 하나의 상담을 시간 순서대로 구간별로 정리한 노트입니다. "
+    "모든 구간의 내용을 빠짐없이 합쳐 하나의 회의록으로 정리하세요.\n\n"
+)
+
+# 실시간 요약 안내: 지금까지의 정리 노트에 새 녹취 구간을 반영
+FOLD_PROMPT = (
+    "📌 **이번 요청 안내 (위 지침보다 우선)**\n"
+    "진행 중인 상담을 실시간으로 정리하고 있습니다. [현재까지 정리 노트]에 [새 녹취 구간]의 내용을 반영하여 "
+    "**갱신된 정리 노트 전체**를 출력하세요.\n\n"
+    "💡 **정리 규칙**\n"
+    "**1. 기존 노트의 내용은 삭제하거나 축약하지 말고, 새 내용을 해당 주제 아래에 추가하거나 수정할 것.\n"
+    "**2. 숫자, 금액, 일정, 제품명, 브랜드명, 치수 등은 **절대 생략하지 말 것**.\n"
+    "**3. '### 상담 개요', '### 세부 상담 내용', '### 결정해야 할 사항', '### 결정된 사항' 구성을 유지할 것.\n"
+    "**4. 새 구간에서 결정이 바뀌면 이전 결정을 고쳐 쓰고 변경 사실을 함께 기록할 것."
+)
+
+# 실시간 요약: 상담 종료 후 최종 정리
+CONSOLIDATE_INSTRUCTION = (
+    "아래는 상담 중 실시간으로 정리한 노트와, 아직 노트에 반영되지 않은 마지막 녹취 구간입니다. "
+    "두 내용을 빠짐없이 합쳐 최종 회의록으로 정리하세요.\n\n"
+)
+
+# 프롬프트 버전: 프롬프트를 수정하면 값이 바뀌어 이전 요약 캐시가 자동으로 무효화됨
+PROMPT_VERSION = make_key(SYSTEM_PROMPT, MAP_PROMPT, REDUCE_INSTRUCTION)
+
+# 요약 결과 캐시 (녹취록 해시 + 모델 + 프롬프트 버전 기준)
+summary_cache = DiskCache(SUMMARY_CACHE_DIR, SUMMARY_CACHE_MAX_MB * 1024 * 1024)
+
+# 요청별 토큰 사용량 기록
+token_ledger = TokenLedger()
+
+def split_transcript(input_text, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """ 녹취록을 줄 단위로 묶어 max_tokens 이하의 구간 리스트로 분할 """
+    chunks, current, current_tokens = [], [], 0
+    for line in input_text.splitlines():
+        # 한 줄이 너무 길면 글자 단위로 나눔
+        pieces = [line[i:i + max_tokens] for i in range(0, len(line), max_tokens)] or [""]
+        for piece in pieces:
+            tokens = count_tokens(piece, SUMMARY_MODEL) + 1
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _chat(stage_prompt, user_content, max_tokens=SUMMARY_MAX_OUTPUT_TOKENS, on_token=None, stage="summary"):
+    """
+    채팅 완성 요청
+    - 첫 메시지는 항상 SYSTEM_PROMPT, 단계별 안내(stage_prompt)는 두 번째 메시지로 보냄 (프롬프트 캐시용 고정 앞부분)
+    - 요청 전 입력 토큰을 계산해 컨텍스트 초과를 경고하고, 응답의 실제 사용량을 token_ledger에 기록
+    - on_token이 있으면 스트리밍으로 받아 조각마다 on_token(text) 호출
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if stage_prompt:
+        messages.append({"role": "system", "content": stage_prompt})
+    messages.append({"role": "user", "content": user_content})
+
+    prompt_tokens = count_message_tokens(messages, SUMMARY_MODEL)
+    if prompt_tokens + max_tokens > SUMMARY_CONTEXT_TOKENS:
+        print(f"⚠️ 입력 {prompt_tokens} + 출력 {max_tokens} 토큰이 컨텍스트 한도 {SUMMARY_CONTEXT_TOKENS}를 넘습니다 ({stage})")
+
+    if on_token is None:
         response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": 
-                    "당신은 **인테리어 디자인 전문가**입니다. "
-                    "주어진 상담 내용을 **세부적으로 정리**하고, **누락 없이 모든 정보를 포함**해야 합니다. "
-                    "이는 단순 요약이 아니라, **회의록 수준의 정리**이며, 모든 숫자, 금액, 일정, 고객 의견 등을 **빠짐없이** 기록해야 합니다.\n\n"
-
-                    "💡 **정리 규칙**\n"
-                    "**1. 인테리어 디자인 맥락에 맞게 단어를 자동 교정하세요.**\n"
-                    "**2. 원본 대화에는 화자가 지정되어 있지 않습니다. 따라서 **자동으로 고객과 디자이너의 화자를 구분하여 정리하세요**.\n"
-                    "**3. 대화 흐름을 유지하며, 논의 과정과 결론까지 포함하여 **상세하게 정리**할 것.\n"
-                    "**4. 상담 내용을 아래 정리 형식 예시에 맞춰 정리하세요.**\n"
-                    "**5. 상담 중 등장한 숫자, 금액, 일정, 제품명, 브랜드명 등을 **절대 생략하지 말 것**.\n"
-                    "**6. 고객의 고민, 선택 과정, 최종 결정까지 상세히 기록할 것.\n"
-                    "**7. 중요 항목은 **강조 표시** (예: 금액, 일정, 고객의 최종 결정 등)\n\n"
-                    "**8. 상담 내용에서 논의된 주제의 개수는 정해져 있지 않으며, 모든 주제를 자동으로 정리하세요.**\n\n"
-                    "**9. 상담 내용을 아래 정리 형식 예시에 맞춰 정리하세요.**\n\n"
-
-                    "📌 **정리 형식 예시**\n"
-                    "### 상담 개요\n"
-                    "- 고객이 기존 아파트 리모델링을 위해 방문 상담 진행.\n"
-                    "- 주방, 욕실, 창호 교체 및 거실 조명 변경 등을 논의.\n"
-                    "- 초기 예산 1,000만 원, 확장 가능성 있음.\n"
-                    "- 가족 구성원: 부부 + 7세 자녀 1명, 반려견 1마리.\n\n"
-
-                    "### 세부 상담 내용\n"
-                    "**1. 주방 리모델링**\n"
-                    "- 고객 요청: ‘한샘’과 ‘LG’ 싱크대 비교 후 결정.\n"
-                    "- 기존 싱크대 철거 비용: 약 **30만 원** 예상.\n"
-                    "- 후드: ‘린나이 자동센서 후드’ 추천, 가격 **45만 원**.\n"
-                    "- 조리대 소재: 엔지니어드 스톤 (한샘 기준 **약 150만 원**)\n\n"
-
-                    "**2. 욕실 개선**\n"
-                    "- 브랜드: 대림 바스 제품 우선 검토.\n"
-                    "- 추가 옵션: ‘웰스 코팅’ 가능 (비용: **15만 원 추가**).\n"
-                    "- 타일 변경 시 비용 증가 가능성 있음 (평균 **200만 원 예상**).\n\n"
-
-                    "**3. 창호 교체**\n"
-                    "- LG 샤시 246mm 교체 가능 여부 확인 중.\n"
-                    "- 거실 창 전체 교체 시 예상 비용 **320만 원**.\n"
-                    "- 추가로 방 창도 교체할 경우 **총 450만 원** 예상.\n\n"
-
-                    "(주제가 많을 경우 자동으로 확장되며, 모든 내용을 포함해야 함.)\n\n"
-
-                    "### 결정해야 할 사항\n"
-                    "- 고객과 전문가가 최종적으로 결정해야 할 사항 (예: 마감재 선택, 예산 조정, 일정 확정 등)\n"
-                    "- 아직 결론이 나지 않은 논의 사항\n\n"
-
-                    "### 결정된 사항\n"
-                    "- 상담 중 최종 결정된 내용 (예: 벽지 색상, 바닥재 선택, 공사 일정 등)\n"
-                    "- 확정된 일정 및 예산\n\n"
-
-                    "위와 같은 형식으로 상담 내용을 최대한 **자세히 기록**하고, 모든 정보를 포함해야 합니다."
-                },
-                {"role": "user", "content": input_text}
-            ],
-            max_tokens=4096  # 응답 길이를 충분히 확보
+            model=SUMMARY_MODEL,
+            messages=messages,
+            max_tokens=max_tokens  # 응답 길이를 충분히 확보
         )
+        if response.usage is not None:
+            token_ledger.record(stage, prompt_tokens, response.usage)
         return response.choices[0].message.content
+
+    stream = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True}  # 마지막 조각에 사용량 포함
+    )
+    pieces = []
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            token_ledger.record(stage, prompt_tokens, chunk.usage)
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.content
+        if token:
+            pieces.append(token)
+            on_token(token)
+    return "".join(pieces)
+
+def summarize_map_reduce(input_text, chunk_tokens=SUMMARY_CHUNK_TOKENS, max_workers=SUMMARY_MAX_WORKERS,
+                         on_token=None):
+    """
+    긴 상담 내용을 구간별로 나눠 동시에 정리(map)한 뒤, 정리된 노트를 최종 형식으로 병합(reduce)
+    전체 소요 시간 ≈ 가장 느린 구간 정리 + 최종 병합 (on_token이 있으면 병합 단계를 스트리밍)
+    """
+    chunks = split_transcript(input_text, chunk_tokens)
+    print(f"🧩 긴 상담 내용: {len(chunks)}개 구간으로 나눠 동시 정리")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_chat, MAP_PROMPT, f"[구간 {i + 1}/{len(chunks)}]\n{chunk}", stage="map")
+                   for i, chunk in enumerate(chunks)]
+        notes = [future.result() for future in futures]
+
+    merged_notes = "\n\n".join(f"[구간 {i + 1}/{len(notes)} 정리 노트]\n{note}" for i, note in enumerate(notes))
+    return _chat(None, REDUCE_INSTRUCTION + merged_notes, on_token=on_token, stage="reduce")
+
+def summarize_text(input_text, on_token=None):
+    """
+    OpenAI GPT-4o 모델을 사용하여 상담 내용을 체계적으로 정리하는 함수
+    on_token: 지정하면 응답을 스트리밍으로 받아 도착하는 텍스트 조각마다 on_token(text) 호출
+    """
+    cache_key = make_key("summary", make_key(input_text), SUMMARY_MODEL, PROMPT_VERSION)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ 캐시된 요약 사용 (적중 {summary_cache.hits} / 미적중 {summary_cache.misses})")
+        if on_token is not None:
+            on_token(cached["summary"])
+        return cached["summary"]
+
+    try:
+        # 남은 입력 예산에 따라 짧은 상담은 한 번에, 긴 상담은 구간별 정리 후 병합
+        transcript_tokens = count_tokens(input_text, SUMMARY_MODEL)
+        prompt_tokens = count_message_tokens([{"content": SYSTEM_PROMPT}, {"content": ""}], SUMMARY_MODEL)
+        strategy, chunk_tokens = choose_strategy(transcript_tokens, prompt_tokens, SUMMARY_CONTEXT_TOKENS,
+                                                 SUMMARY_MAX_OUTPUT_TOKENS, SUMMARY_SINGLE_PASS_TOKENS,
+                                                 SUMMARY_CHUNK_TOKENS)
+        print(f"📏 녹취록 {transcript_tokens} 토큰 + 프롬프트 {prompt_tokens} 토큰 → "
+              f"{'단일 요약' if strategy == 'single' else f'구간 요약 (구간당 {chunk_tokens} 토큰)'}")
+        if strategy == "map_reduce":
+            summary = summarize_map_reduce(input_text, chunk_tokens=chunk_tokens, on_token=on_token)
+        else:
+            summary = _chat(None, input_text, on_token=on_token, stage="single")
+        summary_cache.put(cache_key, {"summary": summary})
+        return summary
     except Exception as e:
         print(f"❌ 요약 오류 발생: {e}")
         return "요약 실패"
+
+class IncrementalSummarizer:
+    """
+    상담 중 실시간 요약
+    - 새 녹취 구간이 들어올 때마다 모아 두었다가 SUMMARY_INCREMENTAL_BLOCK_TOKENS 이상이면
+      백그라운드에서 지금까지의 정리 노트에 반영(fold) (금액·일정·브랜드명 유지)
+    - 상담 종료 후 finish()는 노트 + 남은 구간만으로 짧은 최종 정리 한 번만 요청하여
+      summarize_text와 같은 형식(generate_pdf가 읽는 형식)의 요약 반환
+    """
+
+    def __init__(self, block_tokens=SUMMARY_INCREMENTAL_BLOCK_TOKENS):
+        self.block_tokens = block_tokens
+        self.notes = ""
+        self.summary = None
+        self._pending = []
+        self._pending_tokens = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)  # 노트 갱신은 순서대로 하나씩
+
+    def add_text(self, text):
+        """ 새 녹취 텍스트 추가 (변환 스레드에서 호출) """
+        if not text.strip():
+            return
+        with self._lock:
+            self._pending.append(text)
+            self._pending_tokens += count_tokens(text, SUMMARY_MODEL)
+            if self._pending_tokens < self.block_tokens:
+                return
+            block = "\n".join(self._pending)
+            self._pending, self._pending_tokens = [], 0
+        self._executor.submit(self._fold, block)
+
+    def add_segments(self, segments):
+        self.add_text("\n".join(segment["text"] for segment in segments))
+
+    def _fold(self, block):
+        try:
+            self.notes = _chat(FOLD_PROMPT, f"[현재까지 정리 노트]\n{self.notes or '(없음)'}\n\n[새 녹취 구간]\n{block}",
+                               stage="fold")
+            print("🧠 실시간 요약 노트 갱신 완료")
+        except Exception as e:
+            # 실패한 구간은 다음 갱신(또는 최종 정리)에 다시 포함
+            print(f"⚠️ 실시간 요약 갱신 오류: {e}")
+            with self._lock:
+                self._pending.insert(0, block)
+                self._pending_tokens += count_tokens(block, SUMMARY_MODEL)
+
+    def finish(self, on_token=None):
+        """ 남은 노트 갱신을 기다린 뒤 최종 정리 (이미 정리했으면 저장된 결과 반환) """
+        if self.summary is not None:
+            if on_token is not None:
+                on_token(self.summary)
+            return self.summary
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            tail = "\n".join(self._pending)
+
+        try:
+            self.summary = _chat(
+                None,
+                f"{CONSOLIDATE_INSTRUCTION}[실시간 정리 노트]\n{self.notes or '(없음)'}\n\n[마지막 녹취 구간]\n{tail or '(없음)'}",
+                on_token=on_token,
+                stage="consolidate"
+            )
+        except Exception as e:
+            print(f"❌ 요약 오류 발생: {e}")
+            return "요약 실패"
+        return self.summary
@@ -0,0 +1,74 @@
+import threading
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken이 없으면 글자 수를 보수적인 상한으로 사용
+    tiktoken = None
+
+MESSAGE_OVERHEAD_TOKENS = 3  # 메시지마다 붙는 역할/구분 토큰
+REPLY_PRIMING_TOKENS = 3  # 응답 시작 토큰
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-4o"):
+    """ 로컬 토크나이저로 토큰 수 계산 (tiktoken이 없으면 글자 수) """
+    if tiktoken is None:
+        return len(text)
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model="gpt-4o"):
+    """ 채팅 요청 메시지 전체의 입력 토큰 수 """
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages) + REPLY_PRIMING_TOKENS
+
+
+def choose_strategy(transcript_tokens, prompt_tokens, context_tokens, output_tokens, single_pass_tokens, chunk_tokens):
+    """
+    남은 입력 예산으로 요약 방식 결정
+    반환: ("single", None) 또는 ("map_reduce", 구간 크기)
+    """
+    budget = context_tokens - prompt_tokens - output_tokens
+    if transcript_tokens <= min(budget, single_pass_tokens):
+        return "single", None
+    return "map_reduce", max(1, min(chunk_tokens, budget))
+
+
+class TokenLedger:
+    """ 요청별 예상/실제 토큰 사용량 기록 (실제 값은 API 응답의 usage 기준) """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def record(self, stage, estimated_prompt_tokens, usage):
+        cached = 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None:
+            cached = getattr(details, "cached_tokens", 0) or 0
+        entry = {
+            "stage": stage,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+            "cached_prompt_tokens": cached,
+            "completion_tokens": getattr(usage, "completion_tokens", 0),
+        }
+        with self._lock:
+            self.records.append(entry)
+        print(f"📊 토큰 ({stage}): 입력 {entry['prompt_tokens']} (예상 {estimated_prompt_tokens}, 캐시 {cached}) "
+              f"/ 출력 {entry['completion_tokens']}")
+        return entry
+
+    def totals(self):
+        with self._lock:
+            keys = ("estimated_prompt_tokens", "prompt_tokens", "cached_prompt_tokens", "completion_tokens")
+            totals = {key: sum(r[key] for r in self.records) for key in keys}
+            totals["requests"] = len(self.records)
+            return totals
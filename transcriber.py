@@ -1,122 +1,460 @@
-import whisper
-import torch
 import time
 import openai
 import os
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
-from pydub import AudioSegment
+from audio_io import (load_audio_16k, audio_duration, iter_pcm_blocks, encode_mp3, Resampler,
+                      WHISPER_RATE)
+from config import (CHANNELS, MODEL_SIZE, STREAM_MIN_CHUNK_SECONDS, STREAM_MAX_CHUNK_SECONDS, USE_VAD, WHISPER_ENGINE,
+                    LONG_FORM_MIN_SECONDS, LONG_FORM_WINDOW_SECONDS, LONG_FORM_MIN_WINDOW_SECONDS,
+                    API_MAX_WORKERS, API_MAX_RETRIES, API_RETRY_BASE_DELAY,
+                    TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB)
+from disk_cache import DiskCache, hash_file, make_key
+from segment_store import SegmentStore
+from vad import find_silence_cut, quietest_cut, detect_speech_regions, track_noise_floor, TimelineMap, SpeechFilter
+from model_manager import default_device
+from whisper_engine import get_whisper_engine, resolve_engine, engine_backend, segment_confidence
 
-# GPU 사용 가능 여부 확인
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# GPU 사용 가능 여부 확인 (모델은 첫 변환 시 model_manager가 로드)
+device = default_device()
 print(f"🔍 현재 사용 중인 장치: {'GPU' if device == 'cuda' else 'CPU'}")
 
-# Whisper 모델 로드
-model = whisper.load_model("large-v3").to(device)
-
 # .env 파일 로드 및 OpenAI API 키 설정
+# (OPENAI_BASE_URL을 지정하면 로컬 테스트 서버 등 다른 엔드포인트로 요청)
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI(api_key=api_key)
+client = openai.OpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL"))
 
-def wait_for_file(file_path, timeout=5):
-    """파일이 정상적으로 생성될 때까지 대기"""
-    start_time = time.time()
-    while not os.path.exists(file_path):
-        if time.time() - start_time > timeout:
-            print(f"❌ 파일 생성 실패: {file_path}")
-            return False
-        time.sleep(0.5)  # 0.5초씩 기다림
-    time.sleep(1)  # 추가 대기 (파일 저장 완료될 시간을 줌)
-    print(f"✅ 파일 저장 확인 완료: {file_path}")
-    return True
+# 변환 결과 캐시 (오디오 해시 + 모델/언어/백엔드/VAD 설정 기준)
+transcript_cache = DiskCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+
+def transcript_cache_key(audio_file, backend, model, language, use_vad):
+    return make_key("transcript", hash_file(audio_file), backend, model, language, use_vad)
+
+def print_cache_stats():
+    """ 변환 캐시 현황 출력 (항목 수, 용량, 적중률) """
+    stats = transcript_cache.stats()
+    print(f"📦 변환 캐시: {stats['entries']}개, {stats['bytes'] / 1024 ** 2:.1f}MB / {stats['max_bytes'] / 1024 ** 2:.0f}MB "
+          f"(적중 {stats['hits']} / 미적중 {stats['misses']}, 적중률 {stats['hit_rate'] * 100:.0f}%)")
+
+def write_transcript(output_text_file, segments):
+    """ 변환 구간 리스트를 구간 저장소(.segments.jsonl)에 기록하고 녹취록 텍스트 파일(.txt)도 만들어 둠 """
+    store = SegmentStore.for_transcript(output_text_file)
+    store.write(segments)
+    store.export_text(output_text_file)
 
 def get_file_size(file_path):
     """파일 크기 (MB 단위) 반환"""
     return os.path.getsize(file_path) / (1024 * 1024)
 
-def split_audio_by_size(mp3_file, max_size_mb=20):
-    """MP3 파일을 주어진 용량 이하로 분할"""
-    audio = AudioSegment.from_mp3(mp3_file)
-    total_size = get_file_size(mp3_file)
+def iter_encoded_parts(blocks, name="audio", max_size_mb=24, bitrate="64k", search_ratio=0.2):
+    """
+    int16 PCM 블록을 순서대로 받아 max_size_mb 이하의 MP3 분할본을 메모리에서 바로 만들어
+    (파일 이름, MP3 바이트, 시작 시각(초)) 형태로 하나씩 반환
+    - 목표 길이 직전 search_ratio 구간에서 무음(없으면 가장 조용한 지점)을 찾아 잘라 단어 중간에서 끊기지 않게 함
+    - 분할본이 준비되는 즉시 반환하므로 메모리는 분할본 하나 분량만 사용, 인코딩은 분할본마다 한 번뿐
+    """
+    bits_per_second = int(bitrate.rstrip("k")) * 1000
+    part_samples = int(max_size_mb * 1024 * 1024 * 8 / bits_per_second * 0.95 * WHISPER_RATE)
+    search_from = int(part_samples * (1 - search_ratio))
 
-    # 분할 개수 계산 (20MB 단위)
-    num_parts = int(total_size / max_size_mb) + 1
-    segment_length = len(audio) // num_parts  # 각 파일 길이 (ms)
+    pending, buffered, offset, index = [], 0, 0, 0
+    for block in blocks:
+        pending.append(block)
+        buffered += len(block)
+        while buffered >= part_samples:
+            buffer = np.concatenate(pending)
+            window = buffer[:part_samples]
+            cut = find_silence_cut(window, WHISPER_RATE, search_from=search_from)
+            if cut is None:
+                cut = quietest_cut(window, WHISPER_RATE, search_from=search_from)
+            cut = max(cut, 1)
+            yield f"{name}_part{index}.mp3", encode_mp3(buffer[:cut], bitrate=bitrate), offset / WHISPER_RATE
+            offset += cut
+            index += 1
+            pending, buffered = [buffer[cut:]], len(buffer) - cut
 
-    parts = []
-    for i in range(num_parts):
-        start_time = i * segment_length
-        end_time = min((i + 1) * segment_length, len(audio))
-        part_file = f"{mp3_file[:-4]}_part{i}.mp3"
-        
-        # 오디오 슬라이싱 후 저장
-        audio[start_time:end_time].export(part_file, format="mp3", bitrate="64k")
-        parts.append(part_file)
+    if buffered:
+        yield f"{name}_part{index}.mp3", encode_mp3(np.concatenate(pending), bitrate=bitrate), offset / WHISPER_RATE
 
+def iter_audio_windows(blocks, max_samples, min_samples):
+    """
+    int16 PCM 블록을 순서대로 받아 max_samples 이하의 변환 창을 (시작 샘플, 창 배열) 형태로 하나씩 반환
+    - min_samples 이후의 무음(없으면 가장 조용한 지점)에서 잘라 단어 중간에서 끊기지 않게 함
+    - 창이 채워지는 즉시 반환하므로 메모리는 창 하나 + 읽기 블록 하나 분량만 사용
+    """
+    pending, buffered, offset = [], 0, 0
+    for block in blocks:
+        pending.append(block)
+        buffered += len(block)
+        while buffered >= max_samples:
+            buffer = np.concatenate(pending)
+            window = buffer[:max_samples]
+            cut = find_silence_cut(window, WHISPER_RATE, search_from=min_samples)
+            if cut is None:
+                cut = quietest_cut(window, WHISPER_RATE, search_from=min_samples)
+            cut = max(cut, 1)
+            yield offset, buffer[:cut]
+            offset += cut
+            pending, buffered = [buffer[cut:]], len(buffer) - cut
+
+    if buffered:
+        yield offset, np.concatenate(pending)
+
+def split_audio_by_size(audio_file, max_size_mb=20):
+    """오디오 파일을 주어진 용량 이하의 MP3로 무음 지점에서 분할 저장, [(분할 파일 경로, 시작 시각(초)), ...] 반환"""
+    base = os.path.splitext(audio_file)[0]
+    parts = []
+    for name, data, offset in iter_encoded_parts(iter_pcm_blocks(audio_file), os.path.basename(base), max_size_mb):
+        part_file = os.path.join(os.path.dirname(audio_file), name)
+        with open(part_file, "wb") as f:
+            f.write(data)
+        parts.append((part_file, offset))
     return parts
 
-def transcribe_audio_local(audio_file, output_text_file):
-    print("🧠 Whisper 로컬 변환 시작...")
+def build_speech_timeline(audio):
+    """ VAD로 발화 구간을 찾아 TimelineMap 반환 (무음 비율 출력) """
+    timeline = TimelineMap(detect_speech_regions(audio, WHISPER_RATE), WHISPER_RATE, len(audio))
+    print_vad_summary(timeline)
+    return timeline
+
+def print_vad_summary(timeline):
+    print(f"🔇 VAD: 전체 {timeline.total_samples / WHISPER_RATE:.1f}초 중 무음 {timeline.skipped_seconds:.1f}초 "
+          f"({timeline.skipped_fraction * 100:.1f}%) 건너뜀")
+
+def map_segments_to_original(segments, timeline):
+    """ 압축 타임라인 기준 구간의 start/end를 원본 녹음 시각으로 변환 """
+    if timeline is None:
+        return segments
+    for segment in segments:
+        segment["start"] = timeline.to_original(segment["start"])
+        segment["end"] = timeline.to_original(segment["end"], is_end=True)
+    return segments
+
+def transcribe_segments_local(audio_file, model_size=None, use_vad=USE_VAD, engine=None, audio=None):
+    """
+    로컬 Whisper로 변환하여 [{"start", "end", "text"}, ...] 반환 (캐시 사용)
+    audio: 이미 디코딩된 16kHz float32 배열이 있으면 전달 (화자 분리와 같은 배열을 공유, 다시 디코딩하지 않음)
+    engine: 변환 엔진 이름 (기본: config.WHISPER_ENGINE, whisper_engine.ENGINES 참고)
+    """
+    engine = engine or WHISPER_ENGINE
+    print(f"🧠 Whisper 로컬 변환 시작... (엔진: {engine})")
+    cache_key = transcript_cache_key(audio_file, f"local:{engine_backend(engine)}", model_size or MODEL_SIZE, "ko", use_vad)
+    cached = transcript_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ 캐시된 변환 결과 사용: {audio_file}")
+        print_cache_stats()
+        return cached
+
+    whisper_engine = get_whisper_engine(engine, model_size)
+    if whisper_engine.name != resolve_engine(engine):
+        # 모델 로드 중 다른 엔진으로 대체되었으면 실제 엔진 기준 키로 저장
+        cache_key = transcript_cache_key(audio_file, f"local:{engine_backend(whisper_engine.name)}",
+                                         model_size or MODEL_SIZE, "ko", use_vad)
     start_time = time.time()
-    result = model.transcribe(audio_file, language="ko")
+    # 16kHz WAV는 ffmpeg 디코딩/리샘플링 없이 바로 배열로 읽음
+    if audio is None:
+        audio = load_audio_16k(audio_file)
+
+    # 🔇 발화 구간만 이어 붙여 변환하고, 타임스탬프는 원본 기준으로 복원
+    timeline = build_speech_timeline(audio) if use_vad else None
+    speech = timeline.compact(audio) if timeline else audio
+    if len(speech) == 0:
+        segments = []
+    else:
+        segments = map_segments_to_original(whisper_engine.transcribe(speech, language="ko"), timeline)
     end_time = time.time()
     processing_time = round(end_time - start_time, 2)
-    with open(output_text_file, "w", encoding="utf-8") as f:
-        for segment in result["segments"]:
-            f.write(f"{segment['text']}\n")
-    print(f"📝 변환된 텍스트 저장 완료: {output_text_file}")
+    transcript_cache.put(cache_key, segments)
+    print_cache_stats()
     print(f"⏳ Whisper 로컬 변환 완료. 실행 시간: {processing_time}초")
+    if timeline and timeline.speech_samples:
+        # 같은 처리 속도로 무음 구간까지 변환했을 때 대비 절약된 시간 추정
+        saved = processing_time * timeline.skipped_seconds / (timeline.speech_samples / WHISPER_RATE)
+        print(f"⚡ VAD로 절약된 변환 시간 (추정): {saved:.1f}초")
     print(f"🚀 Whisper 실행 장치: {'GPU' if device == 'cuda' else 'CPU'}")
+    return segments
+
+def transcribe_long_form(audio_file, output_text_file, model_size=None, use_vad=USE_VAD, engine=None,
+                         on_segments=None):
+    """
+    장시간 녹음 로컬 변환 (녹음 길이와 관계없이 메모리 사용량 일정)
+    - 파일 전체를 배열로 올리지 않고 iter_pcm_blocks로 조금씩 읽어 LONG_FORM_WINDOW_SECONDS 이하의 창으로 나눠 변환
+    - 이전 창의 마지막 문장을 프롬프트로 넘겨 창 경계에서도 문맥 유지
+    - 창 변환이 끝날 때마다 구간 저장소에 이어 쓰므로 중간 결과를 바로 확인할 수 있고, 중단되어도 변환된 구간은 남음
+    - on_segments: 창 변환이 끝날 때마다 새 구간 리스트로 호출
+    """
+    engine = engine or WHISPER_ENGINE
+    print(f"🧠 Whisper 장시간 녹음 변환 시작... (엔진: {engine}, 창 {LONG_FORM_WINDOW_SECONDS}초)")
+    cache_key = transcript_cache_key(audio_file, f"local-long:{engine_backend(engine)}", model_size or MODEL_SIZE, "ko", use_vad)
+    cached = transcript_cache.get(cache_key)
+    if cached is not None:
+        write_transcript(output_text_file, cached)
+        print(f"⚡ 캐시된 변환 결과 사용: {output_text_file}")
+        print_cache_stats()
+        return output_text_file
+
+    whisper_engine = get_whisper_engine(engine, model_size)
+    if whisper_engine.name != resolve_engine(engine):
+        # 모델 로드 중 다른 엔진으로 대체되었으면 실제 엔진 기준 키로 저장
+        cache_key = transcript_cache_key(audio_file, f"local-long:{engine_backend(whisper_engine.name)}",
+                                         model_size or MODEL_SIZE, "ko", use_vad)
+    store = SegmentStore.for_transcript(output_text_file)
+    store.write([])
+    start_time = time.time()
+    prompt = noise_db = None
+    total_samples = speech_samples = 0
+    windows = iter_audio_windows(iter_pcm_blocks(audio_file), int(LONG_FORM_WINDOW_SECONDS * WHISPER_RATE),
+                                 int(LONG_FORM_MIN_WINDOW_SECONDS * WHISPER_RATE))
+    for offset, window in windows:
+        start = offset / WHISPER_RATE
+        end = start + len(window) / WHISPER_RATE
+        total_samples += len(window)
+        samples = window.astype(np.float32) / 32768.0
+
+        # 🔇 창 안의 발화 구간만 이어 붙여 변환하고, 타임스탬프는 원본 기준으로 복원
+        timeline = None
+        if use_vad:
+            # 배경 소음 수준은 창을 넘어 추적 (무음뿐인 창을 발화로 오인하지 않도록)
+            noise_db = track_noise_floor(noise_db, samples, WHISPER_RATE)
+            regions = detect_speech_regions(samples, WHISPER_RATE, noise_db=noise_db)
+            timeline = TimelineMap(regions, WHISPER_RATE, len(samples))
+        speech = timeline.compact(samples) if timeline else samples
+        if len(speech) == 0:
+            print(f"🔇 장시간 변환: {start:.1f}s ~ {end:.1f}s 무음 구간 건너뜀")
+            continue
+        speech_samples += len(speech)
+
+        result = map_segments_to_original(whisper_engine.transcribe(speech, language="ko", initial_prompt=prompt), timeline)
+        new_segments = [dict(segment, start=float(segment["start"]) + start, end=float(segment["end"]) + start)
+                        for segment in result]
+        store.append(new_segments)
+        if new_segments:
+            prompt = new_segments[-1]["text"]
+        elapsed = time.time() - start_time
+        print(f"🧠 장시간 변환: {start:.1f}s ~ {end:.1f}s 완료 (경과 {elapsed:.1f}초, {end / elapsed if elapsed else 0:.1f}배속)")
+        if on_segments is not None and new_segments:
+            on_segments(new_segments)
+
+    store.export_text(output_text_file)
+    transcript_cache.put(cache_key, store.read())
+    print_cache_stats()
+    processing_time = round(time.time() - start_time, 2)
+    if use_vad and total_samples:
+        print(f"🔇 VAD: 전체 {total_samples / WHISPER_RATE:.1f}초 중 무음 "
+              f"{(total_samples - speech_samples) / WHISPER_RATE:.1f}초 건너뜀")
+    print(f"⏳ Whisper 장시간 변환 완료. 실행 시간: {processing_time}초")
+    print(f"📝 변환된 텍스트 저장 완료: {output_text_file}")
     return output_text_file
 
-def transcribe_audio_api(audio_file, output_text_file):
+def transcribe_audio_local(audio_file, output_text_file, model_size=None, use_vad=USE_VAD, engine=None):
+    """
+    로컬 Whisper 변환 후 텍스트 파일 저장, 저장 경로 반환
+    (LONG_FORM_MIN_SECONDS 이상 녹음은 장시간 모드로 변환하여 녹음 전체를 메모리에 올리지 않음)
+    """
+    if LONG_FORM_MIN_SECONDS and audio_duration(audio_file) >= LONG_FORM_MIN_SECONDS:
+        return transcribe_long_form(audio_file, output_text_file, model_size, use_vad, engine)
+    segments = transcribe_segments_local(audio_file, model_size, use_vad, engine)
+    write_transcript(output_text_file, segments)
+    print(f"📝 변환된 텍스트 저장 완료: {output_text_file}")
+    return output_text_file
+
+def transcribe_part_api(part_name, data, offset, max_retries=API_MAX_RETRIES):
+    """ 메모리의 MP3 분할본 하나를 API로 변환 (실패 시 지수 백오프로 재시도), 타임스탬프는 offset만큼 이동 """
+    for attempt in range(max_retries + 1):
+        try:
+            response = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(part_name, data),
+                language="ko",
+                response_format="verbose_json"
+            )
+            segments = response.segments if isinstance(response.segments, list) else list(response.segments)
+            return [{"start": segment.start + offset, "end": segment.end + offset, "text": segment.text,
+                     "confidence": segment_confidence(getattr(segment, "avg_logprob", None))}
+                    for segment in segments]
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = API_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+            print(f"⚠️ API 변환 재시도 {attempt + 1}/{max_retries} ({delay:.1f}초 후): {part_name} - {e}")
+            time.sleep(delay)
+
+def transcribe_audio_api(audio_file, output_text_file, use_vad=USE_VAD):
     print("☁️ OpenAI API 변환 시작...")
     
-    if not wait_for_file(audio_file, timeout=10):
+    # 녹음 파일은 녹음 완료 이벤트(recorder.start_recording의 done) 이후에만 넘어오므로 대기하지 않음
+    if not os.path.exists(audio_file):
         print("❌ WAV 파일이 존재하지 않음. 변환 중단.")
         return
-    
-    file_extension = os.path.splitext(audio_file)[1].lower()
-    
-    try:
-        mp3_file = audio_file.replace(file_extension, ".mp3")
-        audio = AudioSegment.from_file(audio_file, format=file_extension[1:])
-        audio.export(mp3_file, format="mp3", bitrate="64k")
-        print(f"🔄 {file_extension.upper()} → MP3 변환 완료: {mp3_file}")
-    except Exception as e:
-        print(f"❌ 오디오 변환 오류: {e}")
-        return
-
-    file_size = get_file_size(mp3_file)
-    print(f"📏 MP3 파일 크기: {file_size:.2f}MB")
 
-    if file_size > 25:
-        print(f"⚠️ 파일 크기가 25MB 초과! 분할 진행 중...")
-        parts = split_audio_by_size(mp3_file, max_size_mb=20)
-    else:
-        parts = [mp3_file]
+    cache_key = transcript_cache_key(audio_file, "api", "whisper-1", "ko", use_vad)
+    cached = transcript_cache.get(cache_key)
+    if cached is not None:
+        write_transcript(output_text_file, cached)
+        print(f"⚡ 캐시된 변환 결과 사용: {output_text_file}")
+        print_cache_stats()
+        return output_text_file
     
-    all_text = []
-    try:
-        for part in parts:
-            with open(part, "rb") as audio:
-                response = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio,
-                    language="ko",
-                    response_format="verbose_json"
-                )
-            segments = response.segments if isinstance(response.segments, list) else list(response.segments)
-            for segment in segments:
-                all_text.append(f"{segment.text}")
-            print(f"✅ OpenAI API 변환 완료: {part}")
+    # 녹음된 PCM에서 바로 업로드용 MP3 분할본을 메모리에 만듦 (전체 MP3 변환/재디코딩/임시 파일 없음)
+    name = os.path.splitext(os.path.basename(audio_file))[0]
+    blocks = iter_pcm_blocks(audio_file)
+    speech_filter = None
+    if use_vad:
+        # 🔇 읽어 들이는 블록마다 발화 구간만 남겨 업로드 (업로드 용량/API 비용 절감, 파일 전체를 메모리에 올리지 않음)
+        speech_filter = SpeechFilter(WHISPER_RATE)
+        blocks = speech_filter.filter(blocks)
+    parts = iter_encoded_parts(blocks, name)
 
-    except Exception as e:
-        print(f"❌ OpenAI API 변환 오류: {e}")
-        return
+    # 분할본이 만들어지는 대로 동시에 업로드하고, 결과는 원래 순서대로 합침
+    all_segments = []
+    failed = False
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS) as pool:
+        try:
+            submitted = [(part, offset, pool.submit(transcribe_part_api, part, data, offset))
+                         for part, data, offset in parts]
+        except Exception as e:
+            print(f"❌ 오디오 변환 오류: {e}")
+            return
+        for part, offset, future in submitted:
+            try:
+                all_segments.extend(future.result())
+                print(f"✅ OpenAI API 변환 완료: {part}")
+            except Exception as e:
+                # 실패한 구간만 표시하고 나머지 결과는 유지 (이 경우 캐시에 저장하지 않음)
+                print(f"❌ OpenAI API 변환 오류 ({part}): {e}")
+                all_segments.append({"start": offset, "end": offset, "text": f"(⚠️ {offset:.0f}초 이후 구간 변환 실패)"})
+                failed = True
 
-    with open(output_text_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(all_text))
+    timeline = None
+    if speech_filter is not None:
+        timeline = speech_filter.timeline()
+        print_vad_summary(timeline)
+    map_segments_to_original(all_segments, timeline)
+    all_segments = [dict(seg, start=float(seg["start"]), end=float(seg["end"])) for seg in all_segments]
+    write_transcript(output_text_file, all_segments)
+    if not failed:
+        transcript_cache.put(cache_key, all_segments)
+    print_cache_stats()
 
     print(f"✅ 최종 변환 완료: {output_text_file}")
     return output_text_file
+
+class StreamingTranscriber:
+    """
+    녹음 중 실시간 변환
+    - 녹음 스레드에서 feed()로 오디오 블록을 받아 버퍼에 모으고
+    - STREAM_MIN_CHUNK_SECONDS 이상 쌓이면 무음 지점에서 잘라 백그라운드 스레드에서 Whisper 변환
+    - 녹음 종료 후 finish()를 호출하면 마지막 남은 구간만 변환하고 결과 파일 저장
+    - on_segments: 구간 변환이 끝날 때마다 새 구간 리스트로 호출 (실시간 요약 등)
+    - engine: 변환 엔진 이름 (기본: config.WHISPER_ENGINE)
+    """
+
+    def __init__(self, output_text_file, model_size=None, language="ko",
+                 min_chunk_seconds=STREAM_MIN_CHUNK_SECONDS, max_chunk_seconds=STREAM_MAX_CHUNK_SECONDS,
+                 on_segments=None, engine=None):
+        self.output_text_file = output_text_file
+        self.on_segments = on_segments
+        self.model_size = model_size
+        self.engine = engine
+        self.language = language
+        self.min_chunk = int(min_chunk_seconds * WHISPER_RATE)
+        self.max_chunk = int(max_chunk_seconds * WHISPER_RATE)
+        self.segments = []
+        self.error = None  # 워커 스레드에서 발생한 첫 변환 오류 (finish()에서 다시 발생)
+        self.store = SegmentStore.for_transcript(output_text_file)
+        self.store.write([])  # 구간이 변환되는 대로 이어 씀 (녹음 중 비정상 종료되어도 변환된 구간은 남음)
+
+        self._resampler = None
+        self._blocks = []
+        self._buffered = 0
+        self._since_check = 0
+        self._offset = 0  # 버퍼 시작 위치 (녹음 시작 기준 샘플 수)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def feed(self, samples, rate):
+        """ 녹음 스레드에서 호출: int16 PCM 블록 추가 (가볍게 유지, 무거운 변환은 워커 스레드에서) """
+        if rate != WHISPER_RATE:
+            if self._resampler is None:
+                self._resampler = Resampler(rate, WHISPER_RATE, channels=CHANNELS)
+            samples = self._resampler.process(samples)
+        else:
+            samples = np.array(samples, dtype=np.int16)  # 녹음 링 버퍼의 뷰일 수 있으므로 복사해서 보관
+        self._blocks.append(samples)
+        self._buffered += len(samples)
+        self._since_check += len(samples)
+
+        # 무음 탐색은 약 1초마다만 수행
+        if self._buffered < self.min_chunk or self._since_check < WHISPER_RATE:
+            return
+        self._since_check = 0
+
+        buffer = np.concatenate(self._blocks)
+        cut = find_silence_cut(buffer, WHISPER_RATE, search_from=self.min_chunk)
+        if cut is None and self._buffered >= self.max_chunk:
+            cut = quietest_cut(buffer[:self.max_chunk], WHISPER_RATE, search_from=self.min_chunk)
+        if cut is not None:
+            self._emit(buffer, cut)
+
+    def _emit(self, buffer, cut):
+        chunk, rest = buffer[:cut], buffer[cut:]
+        self._queue.put((self._offset / WHISPER_RATE, chunk))
+        self._offset += cut
+        self._blocks = [rest] if len(rest) else []
+        self._buffered = len(rest)
+
+    def _run(self):
+        whisper_engine = None
+        noise_db = None  # 구간을 넘어 추적하는 배경 소음 수준 (무음뿐인 구간 판정용)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # 이미 실패했으면 남은 구간은 변환하지 않고 큐만 비움 (feed/finish가 막히지 않도록)
+            offset, chunk = item
+            try:
+                noise_db = track_noise_floor(noise_db, chunk, WHISPER_RATE)
+                regions = detect_speech_regions(chunk, WHISPER_RATE, noise_db=noise_db)
+                if not regions:
+                    print(f"🔇 실시간 변환: {offset:.1f}s ~ {offset + len(chunk) / WHISPER_RATE:.1f}s 무음 구간 건너뜀")
+                    continue
+                if whisper_engine is None:
+                    whisper_engine = get_whisper_engine(self.engine, self.model_size)
+                # 이전 구간의 마지막 문장을 프롬프트로 넘겨 구간 경계에서도 문맥 유지
+                prompt = self.segments[-1]["text"] if self.segments else None
+                result = whisper_engine.transcribe(chunk.astype(np.float32) / 32768.0, language=self.language,
+                                                   initial_prompt=prompt)
+                new_segments = [dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+                                for segment in result]
+                self.segments.extend(new_segments)
+                self.store.append(new_segments)
+                print(f"🧠 실시간 변환: {offset:.1f}s ~ {offset + len(chunk) / WHISPER_RATE:.1f}s 완료")
+                if self.on_segments is not None and new_segments:
+                    self.on_segments(new_segments)
+            except Exception as e:
+                # 첫 오류만 보관하고 finish()에서 다시 발생시켜 잘린 녹취록이 성공으로 처리되지 않게 함
+                print(f"❌ 실시간 변환 오류 ({offset:.1f}s 이후 구간): {e}")
+                self.error = e
+
+    def finish(self):
+        """ 녹음 종료 후 호출: 남은 오디오를 변환하고 결과 파일 저장 (변환 중 오류가 있었으면 그 오류를 다시 발생) """
+        start_time = time.time()
+        if self._buffered:
+            self._emit(np.concatenate(self._blocks), self._buffered)
+        self._queue.put(None)
+        self._worker.join()
+        if self.error is not None:
+            raise RuntimeError(f"실시간 변환 실패: {self.error}") from self.error
+
+        self.store.export_text(self.output_text_file)
+        processing_time = round(time.time() - start_time, 2)
+        print(f"📝 변환된 텍스트 저장 완료: {self.output_text_file}")
+        print(f"⏳ 녹음 종료 후 추가 변환 시간: {processing_time}초")
+        return self.output_text_file
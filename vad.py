@@ -0,0 +1,212 @@
+import numpy as np
+
+FRAME_MS = 30  # 에너지 계산 프레임 길이 (ms)
+NOISE_PERCENTILE = 2  # 배경 소음 수준으로 보는 프레임 에너지 백분위
+DIGITAL_SILENCE_DB = -100.0  # 이보다 작은 프레임은 디지털 무음(0)으로 보고 소음 수준 추정에서 제외
+
+
+def frame_energy_db(samples, rate, frame_ms=FRAME_MS):
+    """ int16/float PCM 배열을 프레임 단위로 나눠 RMS 에너지(dBFS) 배열 반환 """
+    frame_len = int(rate * frame_ms / 1000)
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(samples[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    if np.issubdtype(np.asarray(samples).dtype, np.integer):
+        frames = frames / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-6))
+
+
+def silence_threshold_db(energy_db, margin_db=10.0, speech_gap_db=15.0, floor_db=-60.0, speech_floor_db=-35.0,
+                         noise_margin_db=3.0, noise_db=None):
+    """
+    무음 판정 기준 (dBFS)
+    - 배경 소음 수준: 하위 2% 에너지 (noise_db가 주어지면 이전 블록까지 추적한 소음 수준과 비교해 낮은 쪽)
+      (30초 구간의 0.5초 쉼도 잡히도록 낮은 백분위 사용, 디지털 무음(0) 프레임은 제외)
+    - 소음보다 margin_db 이상 큰 프레임들의 중앙값을 발화 수준으로 보고, 기준은 min(소음 + margin_db, 발화 - speech_gap_db)
+      (발화 비율과 관계없이 발화 수준을 구하므로 무음이 대부분인 녹음에서도 소음을 발화로 오인하지 않음)
+    - 단, 기준은 소음 + noise_margin_db 아래로 내려가지 않음 (발화가 소음보다 조금만 큰 경우에도 소음 프레임은 무음)
+    - 소음보다 뚜렷하게 큰 프레임이 없는 균일한 구간은 전체 무음 또는 전체 발화로 판정
+      (추적한 소음 수준이 있으면 그보다 margin_db 이상 큰지, 없으면 speech_floor_db 이상인지로 판단)
+    """
+    if len(energy_db) == 0:
+        return floor_db
+    audible = energy_db[energy_db > DIGITAL_SILENCE_DB]
+    if len(audible) == 0:
+        return np.inf
+    noise = float(np.percentile(audible, NOISE_PERCENTILE))
+    if noise_db is not None:
+        noise = min(noise, noise_db)
+    louder = energy_db[energy_db >= noise + margin_db]
+    if len(louder) == 0:
+        level = float(np.median(energy_db))
+        is_speech = level >= noise_db + margin_db if noise_db is not None else level >= speech_floor_db
+        return floor_db if is_speech else np.inf
+    speech = float(np.median(louder))
+    return max(min(noise + margin_db, speech - speech_gap_db), noise + noise_margin_db, floor_db)
+
+
+def track_noise_floor(noise_db, samples, rate, rise_db=1.0, stationary_db=5.0, frame_ms=FRAME_MS):
+    """
+    블록 단위로 읽는 오디오의 배경 소음 수준(dBFS) 추적
+    - 이번 블록의 하위 2% 에너지가 더 낮으면 바로 따라 내려가고, 더 높으면 블록마다 rise_db씩만 올라감
+      (발화만 있는 블록에서 발화 수준을 소음으로 잘못 잡지 않도록)
+    - 블록 전체 에너지 변화폭이 stationary_db 이내인 일정한 소음 블록이면 바로 그 수준으로 갱신 (냉난방기 등 소음 증가)
+    """
+    energy = frame_energy_db(samples, rate, frame_ms)
+    energy = energy[energy > DIGITAL_SILENCE_DB]
+    if len(energy) == 0:
+        return noise_db
+    level, typical = (float(v) for v in np.percentile(energy, [NOISE_PERCENTILE, 50]))
+    if noise_db is None or typical - level <= stationary_db:
+        return level
+    return min(level, noise_db + rise_db)
+
+
+def find_silence_cut(samples, rate, search_from=0, min_silence=0.5, frame_ms=FRAME_MS):
+    """
+    search_from(샘플 인덱스) 이후에서 min_silence초 이상 이어지는 마지막 무음 구간을 찾아
+    그 중앙의 샘플 인덱스 반환 (말이 끊기지 않는 자르기 지점), 없으면 None
+    """
+    energy = frame_energy_db(samples, rate, frame_ms)
+    if len(energy) == 0:
+        return None
+    silent = energy < silence_threshold_db(energy)
+    frame_len = int(rate * frame_ms / 1000)
+    first = search_from // frame_len
+    min_frames = max(1, int(min_silence * 1000 / frame_ms))
+
+    # 무음 프레임 연속 구간(run)의 시작/끝 계산
+    padded = np.concatenate([[False], silent[first:], [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    run_starts, run_ends = edges[0::2] + first, edges[1::2] + first
+    long_runs = np.flatnonzero(run_ends - run_starts >= min_frames)
+    if len(long_runs) == 0:
+        return None
+    k = long_runs[-1]
+    return int((run_starts[k] + run_ends[k]) // 2 * frame_len)
+
+
+def quietest_cut(samples, rate, search_from=0, frame_ms=FRAME_MS):
+    """ 무음 구간이 없을 때 search_from 이후 에너지가 가장 낮은 프레임 위치를 자르기 지점으로 반환 """
+    energy = frame_energy_db(samples, rate, frame_ms)
+    frame_len = int(rate * frame_ms / 1000)
+    first = search_from // frame_len
+    if first >= len(energy):
+        return len(samples)
+    return int((first + np.argmin(energy[first:])) * frame_len)
+
+
+def detect_speech_regions(samples, rate, min_speech=0.25, min_silence=1.0, pad=0.2, frame_ms=FRAME_MS, noise_db=None):
+    """
+    에너지 기반 발화 구간 검출
+    - min_silence초보다 짧은 쉼은 발화로 이어 붙이고, min_speech초보다 짧은 소리는 버림
+    - 구간 앞뒤로 pad초 여유를 둠
+    - noise_db: 블록 단위로 나눠 검출할 때 track_noise_floor()로 추적한 배경 소음 수준 (무음뿐인 블록 판정용)
+    반환: [(시작 샘플, 끝 샘플), ...]
+    """
+    energy = frame_energy_db(samples, rate, frame_ms)
+    if len(energy) == 0:
+        return []
+    speech = energy >= silence_threshold_db(energy, noise_db=noise_db)
+    frame_len = int(rate * frame_ms / 1000)
+
+    padded = np.concatenate([[False], speech, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    if len(starts) == 0:
+        return []
+
+    # 짧은 쉼 병합
+    gap_frames = int(min_silence * 1000 / frame_ms)
+    keep = np.ones(len(starts), dtype=bool)
+    keep[1:] = starts[1:] - ends[:-1] > gap_frames
+    group_starts = starts[keep]
+    group_ends = ends[np.concatenate([np.flatnonzero(keep)[1:] - 1, [len(ends) - 1]])]
+
+    # 짧은 잡음 제거 후 여유 추가 (샘플 단위)
+    long_enough = (group_ends - group_starts) * frame_ms / 1000 >= min_speech
+    pad_samples = int(pad * rate)
+    regions = []
+    for s, e in zip(group_starts[long_enough] * frame_len, group_ends[long_enough] * frame_len):
+        s, e = max(0, s - pad_samples), min(len(samples), e + pad_samples)
+        if regions and s <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], e)
+        else:
+            regions.append((int(s), int(e)))
+    return regions
+
+
+class TimelineMap:
+    """
+    발화 구간만 이어 붙인 오디오(압축 타임라인)와 원본 타임라인 사이의 시간 변환
+    - compact()로 발화 구간만 이어 붙인 배열을 만들고
+    - to_original()로 Whisper가 반환한 타임스탬프를 원본 녹음 기준으로 되돌림 (화자 분리 정렬 유지)
+    """
+
+    def __init__(self, regions, rate, total_samples):
+        self.rate = rate
+        self.total_samples = total_samples
+        self.regions = regions
+        lengths = np.array([e - s for s, e in regions], dtype=np.int64)
+        self._orig_starts = np.array([s for s, _ in regions], dtype=np.float64) / rate
+        self._compact_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.float64) / rate
+        self.speech_samples = int(lengths.sum())
+
+    def compact(self, samples):
+        if not self.regions:
+            return samples[:0]
+        return np.concatenate([samples[s:e] for s, e in self.regions])
+
+    def to_original(self, t, is_end=False):
+        """ 압축 타임라인 시각(초, 스칼라 또는 배열)을 원본 시각으로 변환 """
+        if not self.regions:
+            return t
+        t = np.asarray(t, dtype=np.float64)
+        # 구간 경계에 정확히 걸친 끝 시각은 다음 구간이 아니라 이전 구간의 끝으로 매핑
+        side = "left" if is_end else "right"
+        i = np.clip(np.searchsorted(self._compact_starts, t, side=side) - 1, 0, len(self.regions) - 1)
+        mapped = self._orig_starts[i] + (t - self._compact_starts[i])
+        return mapped.item() if mapped.ndim == 0 else mapped
+
+    @property
+    def skipped_seconds(self):
+        return (self.total_samples - self.speech_samples) / self.rate
+
+    @property
+    def skipped_fraction(self):
+        return 1 - self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+
+class SpeechFilter:
+    """
+    블록 단위로 읽어 들이는 오디오에서 발화 구간만 남겨 이어 붙임 (파일 전체를 메모리에 올리지 않음)
+    - filter()로 블록을 통과시키면 블록마다 발화 구간을 검출하고, 원본 기준 구간을 누적
+    - 배경 소음 수준은 블록을 넘어 추적하므로 무음뿐인 블록도 무음으로 판정
+    - 모든 블록을 처리한 뒤 timeline()으로 압축 타임라인 → 원본 시각 변환용 TimelineMap 생성
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.regions = []
+        self.total_samples = 0
+        self.noise_db = None
+
+    def filter(self, blocks):
+        for block in blocks:
+            offset = self.total_samples
+            self.total_samples += len(block)
+            self.noise_db = track_noise_floor(self.noise_db, block, self.rate)
+            regions = detect_speech_regions(block, self.rate, noise_db=self.noise_db)
+            for s, e in regions:
+                # 블록 경계에서 이어지는 발화는 한 구간으로 합침
+                if self.regions and self.regions[-1][1] == offset + s:
+                    self.regions[-1] = (self.regions[-1][0], offset + e)
+                else:
+                    self.regions.append((offset + s, offset + e))
+            if regions:
+                yield np.concatenate([block[s:e] for s, e in regions])
+
+    def timeline(self):
+        return TimelineMap(self.regions, self.rate, self.total_samples)
@@ -0,0 +1,109 @@
+import importlib.util
+import math
+from config import MODEL_SIZE, WHISPER_ENGINE, WHISPER_CPU_THREADS
+from model_manager import manager, default_device, faster_whisper_compute_type
+
+_threads_configured = False
+
+
+def configure_cpu_threads():
+    """ PyTorch CPU 연산 스레드 수 설정 (WHISPER_CPU_THREADS가 0이면 라이브러리 기본값 유지) """
+    global _threads_configured
+    if _threads_configured or WHISPER_CPU_THREADS <= 0:
+        return
+    import torch
+    torch.set_num_threads(WHISPER_CPU_THREADS)
+    _threads_configured = True
+
+
+def segment_confidence(avg_logprob):
+    """ 구간 평균 로그 확률 → 0~1 신뢰도 (값이 없으면 None) """
+    return None if avg_logprob is None else round(math.exp(avg_logprob), 4)
+
+
+class TorchWhisperEngine:
+    """ openai-whisper (PyTorch) 모델로 변환 (기존 경로, int8 동적 양자화 모델도 같은 방식으로 실행) """
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+
+    def transcribe(self, audio, language="ko", initial_prompt=None):
+        """ 16kHz float32 배열 → [{"start", "end", "text", "confidence"}, ...] """
+        result = self.model.transcribe(audio, language=language, initial_prompt=initial_prompt)
+        return [{"start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"],
+                 "confidence": segment_confidence(seg.get("avg_logprob"))}
+                for seg in result["segments"]]
+
+
+class FasterWhisperEngine:
+    """ CTranslate2 기반 faster-whisper 모델로 변환 (int8 양자화 CPU 추론) """
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+
+    def transcribe(self, audio, language="ko", initial_prompt=None):
+        # 기존 경로와 같은 탐욕적 디코딩(beam 1)으로 맞춰 결과/속도를 비교 가능하게 함
+        segments, _ = self.model.transcribe(audio, language=language, initial_prompt=initial_prompt, beam_size=1)
+        return [{"start": float(seg.start), "end": float(seg.end), "text": seg.text,
+                 "confidence": segment_confidence(seg.avg_logprob)} for seg in segments]
+
+
+# 엔진 이름 → (model_manager 로더 이름, 엔진 클래스, 고정 장치)
+ENGINES = {
+    "torch": ("whisper", TorchWhisperEngine, None),
+    "torch-int8": ("whisper-int8", TorchWhisperEngine, "cpu"),  # 동적 양자화 커널은 CPU 전용
+    "faster-whisper": ("faster-whisper", FasterWhisperEngine, None),
+}
+
+
+# 선택 설치 패키지가 필요한 엔진 → 패키지 이름 (설치되어 있지 않으면 torch 엔진으로 대체)
+OPTIONAL_PACKAGES = {"faster-whisper": "faster_whisper"}
+
+
+def resolve_engine(engine=None):
+    """ 실제로 사용할 엔진 이름 (선택 설치 패키지가 없으면 get_whisper_engine과 같이 "torch", 모델은 로드하지 않음) """
+    engine = engine or WHISPER_ENGINE
+    package = OPTIONAL_PACKAGES.get(engine)
+    if package is not None and importlib.util.find_spec(package) is None:
+        return "torch"
+    return engine
+
+
+def engine_backend(engine=None, device=None):
+    """
+    변환 캐시 키에 넣을 엔진 식별 문자열 "엔진:연산 형식" (모델을 로드하지 않고 계산)
+    - 연산 형식(fp32/fp16/int8 등)에 따라 결과가 달라지므로, 설정을 바꾸면 이전 캐시를 쓰지 않도록 함
+    - 요청한 엔진이 아니라 실제로 사용할 엔진 기준 (대체된 torch 결과가 다른 엔진 이름으로 저장되지 않도록)
+    """
+    engine = resolve_engine(engine)
+    _, _, fixed_device = ENGINES.get(engine, (None, None, None))
+    device = fixed_device or device or default_device()
+    if engine == "faster-whisper":
+        compute_type = faster_whisper_compute_type(device)
+    elif engine == "torch-int8":
+        compute_type = "int8"
+    else:
+        compute_type = "float16" if device == "cuda" else "float32"  # openai-whisper는 GPU에서 fp16으로 디코딩
+    return f"{engine}:{compute_type}"
+
+
+def get_whisper_engine(engine=None, size=None, device=None):
+    """
+    로컬 변환 엔진 반환 (기본: config.WHISPER_ENGINE)
+    선택한 엔진의 패키지가 설치되어 있지 않으면 기존 PyTorch 엔진으로 대체
+    """
+    engine = engine or WHISPER_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"알 수 없는 변환 엔진: {engine} (가능: {', '.join(ENGINES)})")
+    configure_cpu_threads()
+    loader, engine_class, fixed_device = ENGINES[engine]
+    try:
+        model = manager.get(loader, size or MODEL_SIZE, fixed_device or device or default_device())
+    except ImportError as e:
+        if engine == "torch":
+            raise
+        print(f"⚠️ {engine} 엔진을 사용할 수 없어 기본 엔진(torch)으로 변환합니다: {e}")
+        return get_whisper_engine("torch", size, device)
+    return engine_class(engine, model)